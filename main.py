@@ -2,10 +2,13 @@ import sys
 import nirukta.patches  # pyright: ignore[reportUnusedImport]  # noqa: F401
 
 from janim.imports import RED, Timeline
-from janim.imports import Config
+from janim.imports import Config, log
+from nirukta import compiler
 
+# The Typst cache is installed into janim by nirukta.patches, so it has to
+# survive reloads along with its statistics.
 for key in list(sys.modules):
-    if key.startswith("nirukta"):
+    if key.startswith("nirukta") and key != "nirukta.compiler":
         del sys.modules[key]
 
 from nirukta.util import choose_nirukta_file, is_nirukta_file, file_to_timeline  # noqa: E402
@@ -24,5 +27,7 @@ class Nirukta(Timeline):
 
     def construct(self):
         assert is_nirukta_file(chosen), "Invalid file"
+        compiler.stats.reset()
         timeline = file_to_timeline(chosen).build().to_item().show()
+        log.info(f"Typst cache: {compiler.stats}")
         self.forward_to(timeline.end)
@@ -0,0 +1,174 @@
+"""Render library files to video without the GUI.
+
+    python -m nirukta.batch [path or glob ...] [--workers N] [--output-dir DIR]
+
+Files are spread over a pool of worker processes, which stay up between
+files with fonts, grammars, caches and an OpenGL context loaded.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from nirukta import profiling
+from nirukta.constants import LIBRARY_DIR
+from nirukta.pool import process_pool, worker_count
+
+FPS = 60
+
+
+@dataclass
+class Result:
+    path: str
+    ok: bool
+    seconds: float
+    detail: str
+    # Profiled spans, see `profiling.drain`
+    events: List[dict] = field(default_factory=list)
+
+
+def nirukta_files(patterns: List[str]) -> List[str]:
+    """Every .sloka/.sutra file matched by `patterns`, with directories
+    standing for all the files below them."""
+    from nirukta.util import is_nirukta_file
+
+    files: set[str] = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True) or [pattern]:
+            if os.path.isdir(path):
+                files.update(glob.glob(f"{path}/**/*.sloka", recursive=True))
+                files.update(glob.glob(f"{path}/**/*.sutra", recursive=True))
+            elif is_nirukta_file(path) and os.path.exists(path):
+                files.add(path)
+            else:
+                print(f"No nirukta files match {pattern}", file=sys.stderr)
+    return sorted(os.path.normpath(f) for f in files)
+
+
+def output_path(path: str, output_dir: str) -> str:
+    relative = os.path.relpath(path, LIBRARY_DIR)
+    if relative.startswith(".."):
+        relative = os.path.basename(path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".mp4")
+
+
+_context = None
+
+
+def warm_up():
+    """Load everything a render needs once per worker."""
+    # Files are the unit of parallelism, don't start pools within pools
+    os.environ["NIRUKTA_WORKERS"] = "1"
+
+    import nirukta.patches  # noqa: F401
+    import nirukta.timelines  # noqa: F401
+    from nirukta.parsing import grammars
+
+    for name in grammars.GRAMMARS:
+        getattr(grammars, name)
+
+
+def opengl_context():
+    global _context
+    if _context is None:
+        from janim.render.base import create_context_430_or_330
+
+        # Without a display, render through EGL
+        if sys.platform == "linux" and not os.environ.get("DISPLAY"):
+            _context = create_context_430_or_330(standalone=True, backend="egl")
+        else:
+            _context = create_context_430_or_330(standalone=True)
+    return _context
+
+
+def render(path: str, output: Optional[str], fps: int) -> Result:
+    from janim.imports import Config
+    from janim.render.writer import VideoWriter
+
+    from nirukta.util import file_to_timeline
+
+    start = time.perf_counter()
+    try:
+        with Config(fps=fps):
+            built = file_to_timeline(path).build(quiet=True)
+        if output is None:
+            detail = f"built, {built.duration:.1f} s long"
+        else:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            VideoWriter(built, ctx=opengl_context()).write_all(output, quiet=True)
+            detail = output
+    except Exception as e:
+        traceback.print_exc()
+        return Result(path, False, time.perf_counter() - start, describe(e), profiling.drain())
+    return Result(path, True, time.perf_counter() - start, detail, profiling.drain())
+
+
+def describe(e: Exception) -> str:
+    message = str(e).strip().splitlines()
+    return f"{type(e).__name__}: {message[0]}" if message else type(e).__name__
+
+
+def summarize(results: List[Result]):
+    width = max(len(result.path) for result in results)
+    print()
+    for result in sorted(results, key=lambda result: result.path):
+        status = "ok" if result.ok else "FAILED"
+        print(f"{result.path:<{width}}  {status:<6}  {result.seconds:8.1f} s  {result.detail}")
+    failed = sum(not result.ok for result in results)
+    total = sum(result.seconds for result in results)
+    print(f"\n{len(results) - failed} succeeded, {failed} failed, {total:.1f} s of work")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m nirukta.batch", description="Render library files to video."
+    )
+    parser.add_argument(
+        "patterns", nargs="*", default=[LIBRARY_DIR], help="files, directories or globs"
+    )
+    parser.add_argument("--workers", type=int, default=worker_count())
+    parser.add_argument("--output-dir", default="videos")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument(
+        "--build-only", action="store_true", help="build the timelines without writing video"
+    )
+    args = parser.parse_args(argv)
+
+    profiling.write_on_exit()
+    files = nirukta_files(args.patterns)
+    if not files:
+        return 1
+
+    outputs = [None if args.build_only else output_path(f, args.output_dir) for f in files]
+    workers = max(1, min(args.workers, len(files)))
+    print(f"Rendering {len(files)} files with {workers} workers")
+
+    results: List[Result] = []
+    with process_pool(workers, initializer=warm_up) as pool:
+        futures = {
+            pool.submit(render, path, output, args.fps): path
+            for path, output in zip(files, outputs)
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died
+                result = Result(futures[future], False, 0.0, describe(e))
+            results.append(result)
+            profiling.merge(result.events)
+            status = "ok" if result.ok else "FAILED"
+            print(f"[{len(results)}/{len(files)}] {result.path}: {status} ({result.seconds:.1f} s)")
+
+    summarize(results)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
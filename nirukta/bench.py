@@ -0,0 +1,1104 @@
+"""Micro-benchmarks and equivalence checks for nirukta's hot paths.
+
+    python -m nirukta.bench [name ...]
+"""
+
+import contextlib
+import glob
+import io
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from nirukta.constants import LIBRARY_DIR
+from nirukta.models import EnglishGloss, Language, SlokaFile, SutraFile
+from nirukta.parsing import grammars
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(fn: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+def library_files() -> List[str]:
+    files = glob.glob(f"{LIBRARY_DIR}/**/*.sloka", recursive=True)
+    files += glob.glob(f"{LIBRARY_DIR}/**/*.sutra", recursive=True)
+    return sorted(os.path.normpath(f) for f in files)
+
+
+def parse_library() -> Iterator[Tuple[str, Union[SlokaFile, SutraFile]]]:
+    """Every file in library/ that currently parses; drafts that don't are
+    reported and skipped."""
+    from nirukta.parsing import SlokaVisitor, SutraVisitor
+
+    for path in library_files():
+        visitor = SutraVisitor if path.endswith(".sutra") else SlokaVisitor
+        try:
+            # The visitors are chatty, keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                parsed = visitor(path).parse()
+        except Exception as e:
+            print(f"  skipping {os.path.basename(path)}: {type(e).__name__}")
+            continue
+        yield path, parsed
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, seconds: float, baseline: float | None = None):
+    line = f"  {label:<32} {seconds * 1000:10.3f} ms"
+    if baseline is not None:
+        line += f"  ({baseline / seconds:.1f}x)"
+    print(line)
+
+
+@benchmark
+def transliteration():
+    """Native SLP1 engine against aksharamukha over every library token."""
+    from nirukta import slp1
+    from nirukta.transliteration import (
+        NATIVE,
+        SCRIPTS,
+        aksharamukha_process,
+        file_slp1s,
+    )
+
+    texts: set[str] = set()
+    for _, parsed in parse_library():
+        texts |= file_slp1s(parsed)
+    native = sorted(t for t in texts if slp1.supports(t))
+    print(f"  {len(native)}/{len(texts)} distinct strings handled natively")
+
+    for text in native:
+        for language in SCRIPTS:
+            expected = aksharamukha_process(text, language)
+            actual = NATIVE[language](text)
+            assert actual == expected, f"{text!r} -> {actual!r}, expected {expected!r}"
+
+    def run(convert: Callable[[str, Language], str]):
+        return lambda: [convert(t, language) for t in native for language in SCRIPTS]
+
+    baseline = best_of(run(aksharamukha_process))
+    report("aksharamukha", baseline)
+    report("native", best_of(run(lambda t, language: NATIVE[language](t))), baseline)
+
+
+def parse_both(path: str, source: str) -> Tuple[object, object]:
+    """Parse `source` as if it were the contents of `path`, with the grammar
+    and with the descent parser. Failures come back as the exception raised,
+    or None where the descent parser didn't match."""
+    from nirukta.parsing import SlokaVisitor, SutraVisitor
+    from nirukta.parsing.descent import DescentParser
+
+    sutra = path.endswith(".sutra")
+    with contextlib.redirect_stdout(io.StringIO()):
+        visitor = (SutraVisitor if sutra else SlokaVisitor)(path, source)
+        try:
+            expected: object = visitor.visit(
+                (grammars.SUTRA_GRAMMAR if sutra else grammars.SLOKA_GRAMMAR).parse(source)
+            )
+        except Exception as e:
+            expected = e
+
+        parser = DescentParser(source)
+        parsed: object = parser.sutra() if sutra else parser.sloka_file()
+        if sutra and parsed is not None:
+            try:
+                parsed = visitor.resolve(*parsed)  # type: ignore[misc]
+            except Exception as e:
+                parsed = e
+    return expected, parsed
+
+
+def corrupted(source: str) -> List[str]:
+    """`source` along with truncated copies and copies missing a character,
+    which make for plenty of both valid and invalid variants of a file."""
+    variants = [source]
+    for i in range(0, len(source), max(1, len(source) // 100)):
+        variants += [source[:i], source[:i] + source[i + 1 :]]
+    return variants
+
+
+@contextlib.contextmanager
+def quiet_logging():
+    # Corrupted etymological glosses are logged, loudly
+    logging.disable(logging.ERROR)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def long_sutra(copies: int = 20) -> Tuple[str, str]:
+    """A path and source for a long sutra, made of every library sloka inlined
+    many times over."""
+    bodies = []
+    for path, parsed in parse_library():
+        if isinstance(parsed, SlokaFile):
+            with open(path) as f:
+                bodies.append(f.read().split("===", 2)[2])
+    source = "=== long sutra ===\n" + "".join(
+        f"\n=== sloka ===\n{body}" for body in bodies * copies
+    )
+    print(f"  long sutra: {len(bodies) * copies} slokas, {len(source) // 1024} KiB")
+    return os.path.join(LIBRARY_DIR, "long.sutra"), source
+
+
+@benchmark
+def parser():
+    """Descent parser against the parsimonious grammars, over library/ and
+    corrupted copies of it, then on one long sutra."""
+    from parsimonious.exceptions import ParseError, VisitationError
+
+    from nirukta.parsing import SutraVisitor
+    from nirukta.parsing.descent import DescentParser
+
+    checked = 0
+    for path in library_files():
+        with open(path) as f:
+            source = f.read()
+
+        for variant in corrupted(source):
+            with quiet_logging():
+                expected, parsed = parse_both(path, variant)
+            if isinstance(expected, ParseError):
+                assert parsed is None, f"{path}: descent parser accepted {variant!r}"
+            elif isinstance(expected, VisitationError):
+                # Parsed fine, but included a file that doesn't exist
+                assert type(parsed) is expected.original_class, f"{path}: {variant!r}"
+            else:
+                assert parsed == expected, f"{path}: models differ for {variant!r}"
+            checked += 1
+    print(f"  {checked} sources parse identically")
+
+    sutra, source = long_sutra()
+    with contextlib.redirect_stdout(io.StringIO()):
+        visitor = SutraVisitor(sutra, source)
+        assert DescentParser(source).sutra() is not None
+        baseline = best_of(lambda: visitor.visit(grammars.SUTRA_GRAMMAR.parse(source)), 3)
+        descent = best_of(lambda: DescentParser(source).sutra(), repeat=3)
+    report("parsimonious", baseline)
+    report("descent", descent, baseline)
+
+
+@benchmark
+def sutra_blocks():
+    """Sutras parsed one sloka block at a time against the whole-file grammar,
+    over library/ and corrupted copies of it, then on one long sutra."""
+    from parsimonious.exceptions import VisitationError
+
+    from nirukta.parsing import SutraVisitor
+
+    checked = 0
+    for path in library_files():
+        if not path.endswith(".sutra"):
+            continue
+        with open(path) as f:
+            source = f.read()
+
+        for variant in corrupted(source):
+            with quiet_logging(), contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    expected: object = SutraVisitor(path, variant).parse_whole()
+                except Exception as e:
+                    expected = e
+                try:
+                    actual: object = SutraVisitor(path, variant).parse_source()
+                except Exception as e:
+                    actual = e
+
+            if isinstance(expected, VisitationError):
+                # Included a file that doesn't exist, which blocks don't wrap
+                assert type(actual) is expected.original_class, f"{path}: {variant!r}"
+            elif isinstance(expected, Exception):
+                assert str(actual) == str(expected), f"{path}: {variant!r}"
+            else:
+                assert actual == expected, f"{path}: models differ for {variant!r}"
+            checked += 1
+    print(f"  {checked} sources parse identically")
+
+    path, source = long_sutra()
+    with contextlib.redirect_stdout(io.StringIO()):
+        visitor = SutraVisitor(path, source)
+        whole = best_of(visitor.parse_whole, repeat=3)
+        blocks = best_of(visitor.parse_source, repeat=3)
+        first = best_of(lambda: next(visitor.iter_slokas()), repeat=3)
+    report("whole file", whole)
+    report("blocks", blocks, whole)
+    report("blocks, first sloka", first, whole)
+
+
+def whole_frame_sources(states) -> List[List[str]]:
+    """Typst source of every frame (sa, tr, en) of `states`, each typeset as a
+    whole in its colors, as frames were before they were composed."""
+    from nirukta.render import text_box
+
+    tokens = [
+        [
+            "".join(f"{text_box(code, color)}<{label}> " for label, code, color in frame)
+            for frame in frames
+        ]
+        for frames in states.tokens
+    ]
+    english = [
+        "".join(
+            code if label is None else f"{text_box(code, colors[label])}<{label}>"
+            for label, code in states.english
+        )
+        for colors in states.english_colors
+    ]
+    return tokens + [english]
+
+
+def frame_transitions() -> List[Tuple[object, object, Dict[str, List[str]]]]:
+    """Consecutive frames of the first utterance of every library file, as
+    typeset `TypstText`s, along with the lineage between them."""
+    import nirukta.patches  # noqa: F401
+    from janim.imports import TypstText
+
+    from nirukta.constants import LATIN_FONT, SANSKRIT_FONT, SCALE
+    from nirukta.render import set_font
+    from nirukta.timelines.utterance import build_utterance_states
+
+    fonts = [SANSKRIT_FONT, LATIN_FONT, LATIN_FONT]
+    transitions = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, parsed in parse_library():
+            slokas = parsed.slokas if isinstance(parsed, SutraFile) else [parsed.sloka]
+            states = build_utterance_states(slokas[0].lines[0].vAkyAni[0])
+            for source, font in zip(whole_frame_sources(states), fonts):
+                frames = [TypstText(set_font(text, font), scale=SCALE) for text in source]
+                lineages = [diff.lineage for diff in states.diffs]
+                transitions += zip(frames, frames[1:], lineages)
+    return transitions
+
+
+@benchmark
+def shape_matching():
+    """Indexed shape matching against pairwise comparisons of every glyph, over
+    the frames of library utterances, then on ever longer compounds."""
+    import difflib
+    from dataclasses import dataclass
+
+    import nirukta.patches  # noqa: F401
+    from janim.imports import TransformMatchingDiff, TypstText, normalize, np
+
+    from nirukta.constants import SANSKRIT_FONT, SCALE
+    from nirukta.models import Language
+    from nirukta.render import set_font, typst_code
+    from nirukta.timelines.transform import ShapeIndex, pieces
+
+    class PairwiseDiff(TransformMatchingDiff):
+        # Every shape hashes the same, so difflib compares each pair of them
+        @dataclass
+        class _MatchWrapper(TransformMatchingDiff._MatchWrapper):
+            def __eq__(self, other):
+                if self.item.points.same_shape(other.item):
+                    return True
+                p1 = self.item.points.get()[:-1]
+                p2 = other.item.points.get()[:-1]
+                if len(p1) != len(p2) or len(p1) < 2:
+                    return False
+                w1 = self.item.points.width_along_direction(
+                    normalize(self.item.points.start_direction)
+                )
+                w2 = other.item.points.width_along_direction(
+                    normalize(other.item.points.start_direction)
+                )
+                return np.allclose(
+                    (p1 - p1[0]) / (w1 or 1.0), (p2 - p2[0]) / (w2 or 1.0), atol=0.33
+                )
+
+            def __hash__(self):
+                return 0
+
+    def opcodes(diff: type, src, target, autojunk: bool = True):
+        return difflib.SequenceMatcher(
+            None, *diff.get_match_sequences(src, target), autojunk=autojunk
+        ).get_opcodes()
+
+    def indexed_opcodes(src, target, autojunk: bool = True):
+        # As `shape_segments` matches them, the target's shapes founding classes
+        index = ShapeIndex()
+        b = [index.classify(piece, represent=True) for piece in pieces(target)]
+        a = [index.classify(piece, represent=False) for piece in pieces(src)]
+        return difflib.SequenceMatcher(None, a, b, autojunk=autojunk).get_opcodes()
+
+    pairs = [(src, target) for src, target, _ in frame_transitions()]
+    for src, target in pairs:
+        assert indexed_opcodes(src, target) == opcodes(PairwiseDiff, src, target)
+    print(f"  {len(pairs)} frame transitions match identically")
+
+    # From 200 shapes on, difflib drops the most common ones from matching,
+    # which is every shape when they all hash the same. Turn that off to
+    # compare like with like.
+    compound = "brahmAcyutaSaNkarapraBftiBirdevEssadA"
+    for copies in [1, 4, 16]:
+        texts = [
+            TypstText(
+                set_font(typst_code(" ".join([text] * copies), Language.SANSKRIT), SANSKRIT_FONT),
+                scale=SCALE,
+            )
+            for text in [compound, compound.replace("S", "s")]
+        ]
+        print(f"  {copies} x {compound}:")
+        baseline = best_of(lambda: opcodes(PairwiseDiff, *texts, False), repeat=3)
+        indexed = best_of(lambda: indexed_opcodes(*texts, False), repeat=3)
+        report("pairwise", baseline)
+        report("indexed", indexed, baseline)
+
+
+@benchmark
+def label_pairing():
+    """Pairing pieces by token label against matching every piece by shape,
+    over the frames of library utterances."""
+    from nirukta.timelines.transform import (
+        labelled_segments,
+        piece_labels,
+        pieces,
+        shape_segments,
+    )
+
+    transitions = frame_transitions()
+    labelled = 0
+    total = 0
+    for src, target, lineage in transitions:
+        segments = labelled_segments(src, target, lineage)
+        src_labels = piece_labels(src)
+        target_labels = piece_labels(target)
+        for tag, a, b in segments:
+            if tag == "equal":
+                # Never pair pieces of unrelated tokens
+                for x, y in zip(a, b):
+                    x_label = src_labels.get(id(x))
+                    y_label = target_labels.get(id(y))
+                    assert x_label == y_label or y_label in lineage.get(x_label, [])  # type: ignore[arg-type]
+        # Every piece is accounted for exactly once
+        assert sorted(id(x) for _, a, _ in segments for x in a) == sorted(map(id, pieces(src)))
+        assert sorted(id(y) for _, _, b in segments for y in b) == sorted(
+            map(id, pieces(target))
+        )
+        assert segments == labelled_segments(src, target, lineage), "not deterministic"
+        labelled += sum(id(x) in src_labels for x in pieces(src))
+        total += len(pieces(src))
+    print(f"  {len(transitions)} frame transitions, {labelled}/{total} pieces labelled")
+
+    baseline = best_of(
+        lambda: [shape_segments(pieces(src), pieces(target)) for src, target, _ in transitions]
+    )
+    by_label = best_of(
+        lambda: [labelled_segments(*transition) for transition in transitions]
+    )
+    report("by shape", baseline)
+    report("by label", by_label, baseline)
+
+
+@benchmark
+def glyph_layout():
+    """Frames composed from the glyphs of each token and recolored, against
+    typesetting every frame whole in its colors, over every utterance in
+    library/."""
+    import nirukta.patches  # noqa: F401
+    from janim.imports import TypstText, np
+
+    from nirukta import layout
+    from nirukta.constants import LATIN_FONT, SANSKRIT_FONT, SCALE
+    from nirukta.compiler import compile_sources
+    from nirukta.render import set_font
+    from nirukta.timelines.utterance import (
+        build_utterance_states,
+        frame_items,
+        states_sources,
+    )
+
+    fonts = [SANSKRIT_FONT, LATIN_FONT, LATIN_FONT]
+    utterances = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, parsed in parse_library():
+            slokas = parsed.slokas if isinstance(parsed, SutraFile) else [parsed.sloka]
+            for utterance in (u for s in slokas for line in s.lines for u in line.vAkyAni):
+                states = build_utterance_states(utterance)
+                compile_sources(states_sources([states]))
+                utterances.append(states)
+
+    def typeset():
+        return [
+            [TypstText(set_font(source, font), scale=SCALE) for source in sources]
+            for states in utterances
+            for sources, font in zip(whole_frame_sources(states), fonts)
+        ]
+
+    def composed():
+        return [frames for states in utterances for frames in frame_items(states)]
+
+    def same(x, y, offset) -> bool:
+        # Subpaths are separated by rows of NaN
+        return np.allclose(
+            x.points.get(), y.points.get() + offset, atol=1e-4, equal_nan=True
+        ) and np.allclose(x.fill.get(), y.fill.get())
+
+    frames = 0
+    for wholes, parts in zip(typeset(), composed()):
+        for whole, part in zip(wholes, parts):
+            offset = whole.points.box.center - part.points.box.center
+            assert whole.groups.keys() == part.groups.keys()
+            assert len(whole) == len(part)
+            for label in whole.groups:
+                a, b = whole.get_label(label), part.get_label(label)
+                assert len(a) == len(b) and all(map(same, a, b, [offset] * len(a))), label
+            assert all(same(x, y, offset) for x, y in zip(whole, part))
+            frames += 1
+    tokens = [
+        (font, code)
+        for states in utterances
+        for font, token_frames in zip(fonts, states.tokens)
+        for frame in token_frames
+        for _, code, _ in frame
+    ]
+    print(f"  {frames} frames of {len(tokens)} tokens compose identically")
+    print(f"  {len(set(tokens))} distinct tokens and {len(utterances)} English lines typeset")
+
+    # Like a fresh process, where janim would parse every frame's SVG
+    layout._glyphs.clear()
+    TypstText.vitem_builders_map.clear()
+    baseline = best_of(typeset, 1)
+    report("typeset, cold", baseline)
+    report("composed, cold", best_of(composed, 1), baseline)
+    warm = best_of(typeset, 1)
+    report("typeset, warm", warm)
+    report("composed, warm", best_of(composed, 1), warm)
+
+
+@benchmark
+def typst_session():
+    """Per-compile latency of short utterance strings from library/, each
+    compiled on its own by a fresh Typst world against the long-lived session
+    nirukta compiles in. Both must produce the same SVG."""
+    import janim.utils.typst_compile as tc
+    import typst
+    from janim.utils.file_ops import get_typst_packages_dir
+
+    from nirukta import compiler
+    from nirukta.constants import LATIN_FONT, SANSKRIT_FONT
+    from nirukta.render import set_font, typst_code
+
+    sources = []
+    for _, parsed in parse_library():
+        slokas = parsed.slokas if isinstance(parsed, SutraFile) else [parsed.sloka]
+        for utterance in (u for s in slokas for line in s.lines for u in line.vAkyAni):
+            sanskrit = " ".join(t if isinstance(t, str) else t.slp1 for t in utterance.tokens)
+            sources.append(set_font(typst_code(sanskrit, Language.SANSKRIT), SANSKRIT_FONT))
+            sources.append(set_font(typst_code(utterance.english, Language.ENGLISH), LATIN_FONT))
+    documents = [
+        tc.get_typst_template().format(
+            shared_preamble="", additional_preamble="", vars="", typst_expression=source
+        )
+        for source in sources
+    ]
+
+    def fresh(document: str, sys_inputs: Dict[str, str] = {}):
+        return typst.compile(
+            input=document.encode("utf-8"),
+            format="svg",
+            font_paths=compiler.project_fonts(),
+            package_path=get_typst_packages_dir(),
+            sys_inputs=sys_inputs,
+        )
+
+    for document in documents:
+        assert fresh(document) == compiler.compile_svg(document, {})
+    print(f"  {len(documents)} strings compile identically")
+
+    # The session keeps its inputs between compilations
+    probe = '#sys.inputs.at("probe", default: "none")'
+    for sys_inputs in [{"probe": "a"}, {"probe": "a"}, {}, {"probe": "b"}, {}]:
+        assert fresh(probe, sys_inputs) == compiler.compile_svg(probe, sys_inputs)
+
+    baseline = best_of(lambda: [fresh(document) for document in documents]) / len(documents)
+    report("fresh world, per compile", baseline)
+    report(
+        "session, per compile",
+        best_of(lambda: [compiler.compile_svg(document, {}) for document in documents])
+        / len(documents),
+        baseline,
+    )
+
+
+@benchmark
+def geometry_store():
+    """Items loaded from the geometry store against janim parsing their SVG,
+    over everything typeset for library/. Both must be the same."""
+    import shutil
+    import tempfile
+
+    import nirukta.patches  # noqa: F401
+    from janim.imports import Config, TypstText, np
+    from janim.items.svg.svg_item import SVGItem
+    from janim.items.text import BasepointVItem
+
+    from nirukta import geometry
+    from nirukta.cache import cache_path
+    from nirukta.compiler import compile_sources, source_key
+    from nirukta.timelines.prewarm import file_sources
+
+    files = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, parsed in parse_library():
+            sources = file_sources(parsed)
+            compile_sources(sources)
+            for preamble, bodies in sources.items():
+                for body in bodies:
+                    key = source_key(
+                        preamble + body,
+                        Config.get.typst_shared_preamble,
+                        Config.get.typst_text_preamble,
+                        "",
+                        {},
+                    )
+                    files.append(cache_path("typst", key + ".svg"))
+    files = list(dict.fromkeys(files))
+
+    # Only SVGs in the Typst cache are stored, janim parses copies anywhere
+    # else every time
+    copies = tempfile.mkdtemp()
+    for path in files:
+        shutil.copy(path, copies)
+    parsed_files = [os.path.join(copies, os.path.basename(path)) for path in files]
+    assert all(geometry.geometry_key(path, TypstText.group_key, False) is None for path in parsed_files)
+
+    def parse():
+        SVGItem.vitem_builders_map.clear()
+        return [TypstText.get_items_from_file(path) for path in parsed_files]
+
+    def load():
+        geometry._loaded.clear()
+        return [TypstText.get_items_from_file(path) for path in files]
+
+    def same(x, y) -> bool:
+        # Subpaths are separated by rows of NaN
+        return (
+            type(x) is type(y)
+            and np.array_equal(x.points.get(), y.points.get(), equal_nan=True)
+            and np.array_equal(x.radius.get(), y.radius.get())
+            and np.array_equal(x.stroke.get(), y.stroke.get())
+            and np.array_equal(x.fill.get(), y.fill.get())
+            and (
+                not isinstance(x, BasepointVItem)
+                or np.array_equal(x.mark.get_points(), y.mark.get_points())
+            )
+        )
+
+    # Whatever isn't stored yet is parsed and stored the first time
+    load()
+    items = 0
+    for (parsed_items, parsed_groups), (loaded_items, loaded_groups) in zip(parse(), load()):
+        assert len(parsed_items) == len(loaded_items)
+        assert all(map(same, parsed_items, loaded_items))
+        assert parsed_groups.keys() == loaded_groups.keys()
+        for label in parsed_groups:
+            indices = [parsed_items.index(item) for item in parsed_groups[label]]
+            assert indices == [loaded_items.index(item) for item in loaded_groups[label]]
+        items += len(parsed_items)
+    print(f"  {items} items of {len(files)} SVGs load identically from the store")
+
+    baseline = best_of(parse, repeat=3)
+    report("parsed", baseline)
+    report("stored", best_of(load, repeat=3), baseline)
+    shutil.rmtree(copies)
+
+
+@benchmark
+def gloss_index():
+    """Indexed gloss references against searching the English from the start
+    for every gloss, over library utterances and then one long utterance.
+    References are asked for twice per utterance, by `process_token` and
+    `build_display_token`."""
+    from nirukta.models import GlossIndex, SimpleToken, Utterance
+
+    def simple_tokens(token) -> Iterator[SimpleToken]:
+        if isinstance(token, SimpleToken):
+            yield token
+        elif not isinstance(token, str):
+            for part in token.parts:
+                yield from simple_tokens(part)
+
+    def find_nth(haystack: str, needle: str, n: int) -> int:
+        start = haystack.find(needle)
+        while start >= 0 and n > 1:
+            start = haystack.find(needle, start + len(needle))
+            n -= 1
+        return start
+
+    # As `SimpleToken.gloss_refs` and `EnglishGloss.find_reference` were
+    def find_reference(gloss: EnglishGloss, english: str, visited: set) -> Tuple[int, int]:
+        n = 1
+        while True:
+            start = find_nth(english, gloss.text, n)
+            assert start >= 0
+            span = (start, start + len(gloss.text))
+            assert english[span[0] : span[1]] == gloss.text
+            if span not in visited:
+                return span
+            n += 1
+
+    def gloss_refs(simple: SimpleToken, english: str, visited: set) -> List[Tuple[int, int]]:
+        refs = []
+        for gloss in simple.glosses:
+            if isinstance(gloss, EnglishGloss):
+                ref = find_reference(gloss, english, visited)
+                visited.add(ref)
+                refs.append(ref)
+        return refs
+
+    def searched(utterance: Utterance) -> List[Tuple[int, int]]:
+        # Each walk searched with a fresh set of visited spans
+        for _ in range(2):
+            visited: set[Tuple[int, int]] = set()
+            spans = [
+                span
+                for token in utterance.tokens
+                for simple in simple_tokens(token)
+                for span in gloss_refs(simple, utterance.english, visited)
+            ]
+        return spans
+
+    def indexed(utterance: Utterance) -> List[Tuple[int, int]]:
+        index = GlossIndex(utterance.english)
+        for _ in range(2):
+            spans = [
+                span
+                for token in utterance.tokens
+                for simple in simple_tokens(token)
+                for span in simple.gloss_refs(index)
+            ]
+        return spans
+
+    utterances = [
+        utterance
+        for _, parsed in parse_library()
+        for sloka in (parsed.slokas if isinstance(parsed, SutraFile) else [parsed.sloka])
+        for line in sloka.lines
+        for utterance in line.vAkyAni
+    ]
+    for utterance in utterances:
+        assert indexed(utterance) == searched(utterance), utterance.english
+    print(f"  {len(utterances)} utterances resolve identically")
+
+    baseline = best_of(lambda: [searched(u) for u in utterances])
+    report("library, searched", baseline)
+    report("library, indexed", best_of(lambda: [indexed(u) for u in utterances]), baseline)
+
+    # Every word glossed, with the same few words over and over
+    words = ["the", "of", "and", "to", "that"] * 200
+    long = Utterance(
+        tokens=[SimpleToken(f"w{i}", [EnglishGloss(word)]) for i, word in enumerate(words)],
+        english=" ".join(words),
+    )
+    assert indexed(long) == searched(long)
+    baseline = best_of(lambda: searched(long), repeat=3)
+    report(f"{len(words)} glosses, searched", baseline)
+    report(f"{len(words)} glosses, indexed", best_of(lambda: indexed(long), repeat=3), baseline)
+
+
+@benchmark
+def frame_sequence():
+    """Delta-encoded frames against copying every frame and comparing them
+    token by token, over library utterances and then one deep compound."""
+    import tracemalloc
+    from itertools import count
+
+    from nirukta.models import Animation, DisplayToken, FrameSequence
+    from nirukta.strings import unswara
+    from nirukta.timelines.utterance import build_display_tokens
+
+    def copied_frames(tokens: List[DisplayToken]) -> List[List[DisplayToken]]:
+        current = list(tokens)
+        frames = [list(current)]
+        while True:
+            idx = next((i for i, t in enumerate(current) if not t.is_leaf), None)
+            if idx is None:
+                break
+            current = current[:idx] + current[idx].children + current[idx + 1 :]
+            frames.append(list(current))
+        return frames
+
+    def compared(frames: List[List[DisplayToken]]) -> List[Tuple[Animation, str]]:
+        diffs = []
+        for fa, fb in zip(frames, frames[1:]):
+            for a, b in zip(fa, fb):
+                if len(fa) != len(fb) and a.slp1 != b.slp1:
+                    diffs.append((Animation.EXPAND, a.id))
+                elif unswara(a.slp1) != a.slp1 and unswara(a.slp1) == b.slp1:
+                    diffs.append((Animation.SWARAS, a.id))
+                elif a.slp1 != b.slp1:
+                    diffs.append((Animation.SPELLS, a.id))
+                elif a.color != b.color:
+                    diffs.append((Animation.COLORS, a.id))
+                else:
+                    continue
+                break
+        return diffs
+
+    def delta(tokens: List[DisplayToken]) -> List[List[DisplayToken]]:
+        return [list(frame) for frame in FrameSequence(tokens)]
+
+    checked = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, parsed in parse_library():
+            slokas = parsed.slokas if isinstance(parsed, SutraFile) else [parsed.sloka]
+            for line in (line for sloka in slokas for line in sloka.lines):
+                for utterance in line.vAkyAni:
+                    tokens = build_display_tokens(utterance)
+                    steps = FrameSequence(tokens).steps
+                    assert delta(tokens) == copied_frames(tokens)
+                    assert [(step.animation, step.token.id) for step in steps] == compared(
+                        copied_frames(tokens)
+                    )
+                    checked += 1
+    print(f"  {checked} utterances expand and classify identically")
+
+    # Every compound nests the next one, along with a word either side
+    depth = 300
+    ids = count()
+    token = DisplayToken("x", "white", [], [], next(ids))
+    for i in range(depth):
+        words = [DisplayToken(word, "white", [], [], next(ids)) for word in "ab"]
+        token = DisplayToken(f"c{i}", "white", [words[0], token, words[1]], [], next(ids))
+
+    def peak(fn: Callable[[], object]) -> int:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    print(f"  compounds nested {depth} deep:")
+    baseline = best_of(lambda: compared(copied_frames([token])), repeat=3)
+    report("copied and compared", baseline)
+    delta_encoded = best_of(
+        lambda: [step.animation for step in FrameSequence([token]).steps], repeat=3
+    )
+    report("delta-encoded", delta_encoded, baseline)
+    copied_peak = peak(lambda: compared(copied_frames([token])))
+    delta_peak = peak(lambda: FrameSequence([token]))
+    print(f"  peak memory: {copied_peak // 1024} KiB copied, {delta_peak // 1024} KiB delta")
+
+
+@benchmark
+def display_tokens():
+    """Slotted display tokens with integer ids against dataclasses with UUIDs
+    and recursive traversal, building every utterance of one long sutra."""
+    import tracemalloc
+    import uuid
+    from dataclasses import dataclass, field
+    from unittest import mock
+
+    from nirukta.models import DisplayToken
+    from nirukta.parsing import SutraVisitor
+    from nirukta.timelines.utterance import build_display_tokens
+
+    @dataclass
+    class UuidDisplayToken:
+        slp1: str
+        color: str
+        children: List["UuidDisplayToken"]
+        english_spans: List[Tuple[int, int]]
+        id: str = field(default_factory=lambda: str(uuid.uuid4()))
+        is_root: bool = field(default=False)
+
+        def __post_init__(self):
+            # Whatever the id it is given, as ids were
+            self.id = str(uuid.uuid4())
+
+        @property
+        def is_leaf(self) -> bool:
+            return not self.children
+
+        def at_depth(self, depth: int) -> List["UuidDisplayToken"]:
+            if self.is_leaf or depth == 0:
+                return [self]
+            return [leaf for child in self.children for leaf in child.at_depth(depth - 1)]
+
+        def all_spans(self):
+            def __all_spans(dt, spans):
+                new_spans = spans + dt.english_spans
+                for child in dt.children:
+                    new_spans.extend(__all_spans(child, []))
+                return new_spans
+
+            return sorted(__all_spans(self, []), key=lambda x: x[0])
+
+    path, source = long_sutra(copies=5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = SutraVisitor(path, source).parse_source()
+    utterances = [u for s in parsed.slokas for line in s.lines for u in line.vAkyAni]
+
+    def build(cls: type) -> list:
+        with mock.patch("nirukta.models.tokens.DisplayToken", cls):
+            trees = [cls("", "white", build_display_tokens(u), [], -1) for u in utterances]
+        for tree in trees:
+            tree.all_spans()
+            tree.at_depth(3)
+        return trees
+
+    for old, new in zip(build(UuidDisplayToken), build(DisplayToken)):
+        assert old.all_spans() == new.all_spans()
+        assert [t.slp1 for t in old.at_depth(3)] == [t.slp1 for t in new.at_depth(3)]
+    print(f"  {len(utterances)} utterances build identical trees")
+
+    # Ids count up from 0 within each utterance
+    largest = 0
+    for tree in build(DisplayToken):
+        ids = []
+        stack = list(tree.children)
+        while stack:
+            token = stack.pop()
+            ids.append(token.id)
+            stack.extend(token.children)
+        assert sorted(ids) == list(range(len(ids)))
+        largest = max(largest, len(ids) - 1)
+    print(f"  ids numbered per utterance, the largest {largest}")
+
+    def retained(cls: type) -> int:
+        tracemalloc.start()
+        trees = build(cls)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del trees
+        return size
+
+    baseline = best_of(lambda: build(UuidDisplayToken), repeat=3)
+    report("dataclass, uuid", baseline)
+    report("slotted, int", best_of(lambda: build(DisplayToken), repeat=3), baseline)
+    old_size, new_size = retained(UuidDisplayToken), retained(DisplayToken)
+    print(f"  trees take {old_size // 1024} KiB as dataclasses, {new_size // 1024} KiB slotted")
+
+
+@benchmark
+def fonts():
+    """Font metadata read from the cache against parsing every font file."""
+    from nirukta import fonts
+
+    files = fonts.font_files()
+    for path in files:
+        assert fonts.font_metadata(path) == fonts.read_metadata(path)
+    print(f"  {len(files)} fonts read identically from the cache")
+
+    baseline = best_of(lambda: [fonts.read_metadata(path) for path in files])
+    report("parsed", baseline)
+    report("cached", best_of(lambda: [fonts.font_metadata(path) for path in files]), baseline)
+
+
+@benchmark
+def import_time():
+    """Importing the models and parsing layers, each in a fresh interpreter,
+    against importing the timelines. The former must not load janim, Qt or
+    aksharamukha."""
+    import subprocess
+
+    heavy = ["janim", "PySide6", "aksharamukha"]
+    script = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+    def import_in_fresh_interpreter(module: str) -> Tuple[float, str]:
+        output = subprocess.run(
+            [sys.executable, "-c", script.format(module=module, heavy=heavy)],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.join(os.path.dirname(__file__), ".."),
+        ).stdout.split("\n")
+        return float(output[0]), output[1]
+
+    baseline, _ = import_in_fresh_interpreter("nirukta.timelines")
+    report("nirukta.timelines", baseline)
+    for module in ["nirukta.models", "nirukta.parsing", "nirukta.parsing.descent", "nirukta.util"]:
+        seconds, loaded = import_in_fresh_interpreter(module)
+        assert not loaded, f"importing {module} loads {loaded}"
+        report(module, seconds, baseline)
+
+
+@benchmark
+def prewarm():
+    """Building every file in library/ from a cold cache, in a fresh
+    interpreter, with everything typeset by the prewarm against typesetting
+    as the timelines are built. Nothing may be compiled outside the prewarm."""
+    import subprocess
+    import tempfile
+
+    script = """
+import sys, time
+import nirukta.patches
+from nirukta import compiler
+from nirukta.timelines import prewarm, sloka_file, sutra_file
+from nirukta.util import file_to_timeline
+
+warmed = 0
+def counted(*args):
+    global warmed
+    before = compiler.stats.compilations
+    if {enabled}:
+        prewarm.prewarm(*args)
+    warmed += compiler.stats.compilations - before
+sloka_file.prewarm = sutra_file.prewarm = counted
+
+start = time.perf_counter()
+file_to_timeline({path!r}).build(quiet=True)
+print(time.perf_counter() - start, warmed, compiler.stats.compilations)
+"""
+
+    def build_cold(path: str, enabled: bool) -> Tuple[float, int, int]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            output = subprocess.run(
+                [sys.executable, "-c", script.format(path=path, enabled=enabled)],
+                capture_output=True,
+                check=True,
+                text=True,
+                cwd=os.path.join(os.path.dirname(__file__), ".."),
+                env={**os.environ, "NIRUKTA_CACHE_DIR": cache_dir},
+            ).stdout.splitlines()
+        seconds, warmed, compilations = output[-1].split()
+        return float(seconds), int(warmed), int(compilations)
+
+    baseline = prewarmed = 0.0
+    for path, _ in parse_library():
+        lazy_seconds, _, lazy = build_cold(path, False)
+        seconds, warmed, compilations = build_cold(path, True)
+        assert compilations == warmed, f"{path} compiled {compilations - warmed} sources outside the prewarm"
+        print(f"  {os.path.basename(path)}: {lazy} compilations lazily, {warmed} prewarmed")
+        baseline += lazy_seconds
+        prewarmed += seconds
+    report("lazily", baseline)
+    report("prewarmed", prewarmed, baseline)
+
+
+@benchmark
+def worker_pool():
+    """Building every file in library/ from a cold cache, in a fresh
+    interpreter, with utterances typeset by the timelines themselves (no
+    prewarm) on one worker against one per core, and at least two. Both must
+    build the same timeline."""
+    import subprocess
+    import tempfile
+
+    script = """
+import time
+import nirukta.patches
+from nirukta import compiler
+from nirukta.timelines import sloka_file, sutra_file
+from nirukta.util import file_to_timeline
+
+sloka_file.prewarm = sutra_file.prewarm = lambda *args: None
+start = time.perf_counter()
+built = file_to_timeline({path!r}).build(quiet=True)
+print(time.perf_counter() - start, built.duration, compiler.stats.compilations)
+"""
+
+    def build_cold(path: str, workers: int) -> Tuple[float, float, int]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            output = subprocess.run(
+                [sys.executable, "-c", script.format(path=path)],
+                capture_output=True,
+                check=True,
+                text=True,
+                cwd=os.path.join(os.path.dirname(__file__), ".."),
+                env={**os.environ, "NIRUKTA_CACHE_DIR": cache_dir, "NIRUKTA_WORKERS": str(workers)},
+            ).stdout.splitlines()
+        seconds, duration, compilations = output[-1].split()
+        return float(seconds), float(duration), int(compilations)
+
+    workers = max(2, os.cpu_count() or 1)
+    print(f"  {os.cpu_count()} cores, {workers} workers")
+    serial = pooled = 0.0
+    for path, _ in parse_library():
+        serial_seconds, serial_duration, serial_compilations = build_cold(path, 1)
+        seconds, duration, compilations = build_cold(path, workers)
+        assert duration == serial_duration, f"{path} built {duration}s rather than {serial_duration}s"
+        print(f"  {os.path.basename(path)}: {serial_compilations} compilations serially, {compilations} pooled")
+        serial += serial_seconds
+        pooled += seconds
+    report("one worker", serial)
+    report(f"{workers} workers", pooled, serial)
+
+
+@benchmark
+def formatter():
+    """Formatting over library/ and corrupted copies of it: formatted files
+    parse to the same models and format to themselves. Then a whole library
+    formatted, and checked again once cached."""
+    import shutil
+    import tempfile
+
+    from nirukta import format
+
+    checked = 0
+    for path in library_files():
+        with open(path) as f:
+            source = f.read()
+        sutra = path.endswith(".sutra")
+        parse = format.parse_sutra if sutra else format.parse_sloka
+
+        for variant in corrupted(source):
+            with quiet_logging(), contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    expected = parse(variant)
+                    formatted = format.format_source(variant, sutra)
+                except Exception:
+                    continue
+                assert parse(formatted) == expected, f"{path}: models differ for {variant!r}"
+            assert format.format_source(formatted, sutra) == formatted, f"{path}: {variant!r}"
+            checked += 1
+    print(f"  {checked} sources format to the same models")
+
+    _, source = long_sutra()
+    report("long sutra", best_of(lambda: format.format_source(source, True), 3))
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = os.path.join(directory, "library")
+        shutil.copytree(LIBRARY_DIR, library)
+        files = library_files()
+        for i in range(20):
+            shutil.copytree(LIBRARY_DIR, os.path.join(library, f"copy{i}"))
+            # Unique contents, so that no copy is skipped as formatted already
+            for path in files:
+                copy = os.path.join(library, f"copy{i}", os.path.relpath(path, LIBRARY_DIR))
+                with open(copy, "a") as f:
+                    f.write("\n" * (i + 1))
+
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            format.main([library])
+            cold = time.perf_counter() - start
+            cached = best_of(lambda: format.main([library, "--check"]), 3)
+        print(f"  library of {21 * len(files)} files")
+        report("formatted", cold)
+        report("checked, cached", cached, cold)
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Unknown benchmark {name!r}, pick from {list(BENCHMARKS)}")
+        print(f"{name}:")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import hashlib
+import os
+from functools import cache
+from glob import glob
+
+from nirukta.constants import CACHE_DIR
+
+
+def cache_path(*parts: str) -> str:
+    """Path to a file inside nirukta's on-disk cache, creating its directory."""
+    directory = os.path.join(CACHE_DIR, *parts[:-1])
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, parts[-1])
+
+
+@cache
+def code_fingerprint() -> str:
+    """Identifies the code cached models and frame states were built by."""
+    md5 = hashlib.md5()
+    for path in sorted(glob(f"{os.path.dirname(__file__)}/**/*.py", recursive=True)):
+        with open(path, "rb") as f:
+            md5.update(f.read())
+    return md5.hexdigest()
@@ -0,0 +1,372 @@
+import hashlib
+import os
+import subprocess as sp
+from dataclasses import dataclass
+from functools import cache
+from importlib.metadata import version
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import typst
+import janim.items.svg.typst as typst_item
+import janim.utils.typst_compile as tc
+from janim.exception import (
+    EXITCODE_TYPST_COMPILE_ERROR,
+    EXITCODE_TYPST_NOT_FOUND,
+    ExitException,
+)
+from janim.imports import Config, log
+from janim.items.svg.svg_item import SVGItem
+from janim.utils.file_ops import get_typst_packages_dir
+
+from nirukta import geometry, profiling
+from nirukta.cache import cache_path
+from nirukta.constants import FONT_DIR
+from nirukta.pool import process_pool, worker_count
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Typst invocations, a batch compiles many pages at once
+    compilations: int = 0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.compilations = 0
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{self.compilations} compilations"
+        )
+
+
+stats = CacheStats()
+
+
+@cache
+def project_fonts() -> typst.Fonts:
+    """The project fonts, and only those, searched for on first use."""
+    return typst.Fonts(False, False, [FONT_DIR])
+
+
+@cache
+def session() -> typst.Compiler:
+    """A Typst compiler kept for the life of the process, so that compilations
+    share the loaded fonts and whatever Typst memoized from the last ones,
+    like the shaping of the preamble's text."""
+    return typst.Compiler(font_paths=project_fonts(), package_path=get_typst_packages_dir())
+
+
+# What the session was last given as `sys.inputs`, which it keeps until told
+# otherwise
+_session_inputs: dict[str, str] = {}
+
+
+def compile_svg(typst_content: str, sys_inputs: dict[str, str]) -> bytes | List[bytes]:
+    """`typst_content` compiled to SVG in the `session`, a page or a list of
+    pages."""
+    global _session_inputs
+    if sys_inputs == _session_inputs:
+        return session().compile(input=typst_content.encode("utf-8"), format="svg")
+
+    # Passing inputs at all rebuilds the session's standard library, and with
+    # it everything memoized, so only when they change
+    _session_inputs = dict(sys_inputs)
+    return session().compile(
+        input=typst_content.encode("utf-8"), format="svg", sys_inputs=sys_inputs
+    )
+
+
+@cache
+def fonts_fingerprint() -> str:
+    """Identifies the font set and Typst version that compiled output depends on."""
+    md5 = hashlib.md5(version("typst").encode())
+    for name in sorted(os.listdir(FONT_DIR)):
+        st = os.stat(os.path.join(FONT_DIR, name))
+        md5.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return md5.hexdigest()
+
+
+def source_key(
+    text: str,
+    shared_preamble: str,
+    additional_preamble: str,
+    vars: str,
+    sys_inputs: dict[str, str],
+) -> str:
+    # The page width derived from SCALE is emitted by `set_font` as part of
+    # `text`, so it is covered here along with the font set.
+    md5 = hashlib.md5(fonts_fingerprint().encode())
+    for part in (text, shared_preamble, additional_preamble, vars):
+        md5.update(part.encode())
+        md5.update(b"\0")
+    md5.update("\n".join(tc.get_sys_inputs_pairs(sys_inputs)).encode())
+    return md5.hexdigest()
+
+
+def compile_typst(
+    text: str,
+    shared_preamble: str,
+    additional_preamble: str,
+    vars: str,
+    sys_inputs: dict[str, str],
+) -> str:
+    """Drop-in replacement for janim's `compile_typst`, backed by a persistent
+    content-addressed cache shared across runs and files."""
+    key = source_key(text, shared_preamble, additional_preamble, vars, sys_inputs)
+    svg_file_path = cache_path("typst", key + ".svg")
+    if os.path.exists(svg_file_path):
+        stats.hits += 1
+        return svg_file_path
+
+    stats.misses += 1
+    stats.compilations += 1
+    typst_content = tc.get_typst_template().format(
+        shared_preamble=shared_preamble,
+        additional_preamble=additional_preamble,
+        vars=vars,
+        typst_expression=text,
+    )
+
+    with profiling.span("typst", "typst"):
+        if tc._flag_use_external_typst:
+            # Compile next to the final path and move it into place so that a
+            # half-written file is never mistaken for a cache hit
+            tmp_file_path = f"{svg_file_path[:-4]}.{os.getpid()}.tmp.svg"
+            tc._compile_typst_by_external_executable(
+                typst_content, tmp_file_path, tc.get_sys_inputs_pairs(sys_inputs)
+            )
+            os.replace(tmp_file_path, svg_file_path)
+            return svg_file_path
+
+        try:
+            svg = compile_svg(typst_content, sys_inputs)
+        except typst.TypstError as e:
+            # As janim reports it
+            log.error(e.diagnostic.removesuffix("\n"), extra={"raw": True})
+            log.error("Typst compilation error. Please check the output for more information.")
+            raise ExitException(EXITCODE_TYPST_COMPILE_ERROR)
+
+    # A single page, as `typst_content` has no page breaks of its own
+    _store(svg_file_path, svg)  # type: ignore[arg-type]
+    return svg_file_path
+
+
+def query(typst_content: str, selector: str, field: str) -> str:
+    """The `field` of the one element `selector` matches in `typst_content`, as
+    JSON, with the same fonts and Typst as `compile_typst` uses."""
+    if tc._flag_use_external_typst:
+        commands = [Config.get.typst_bin, "query", "-", selector, "--field", field, "--one"]
+        commands += ["--package-path", get_typst_packages_dir()]
+        try:
+            process = sp.run(commands, input=typst_content.encode("utf-8"), stdout=sp.PIPE)
+        except FileNotFoundError:
+            log.error("Could not query Typst document by external executable.")
+            raise ExitException(EXITCODE_TYPST_NOT_FOUND)
+        if process.returncode != 0:
+            log.error("Typst query error. Please check the output for more information.")
+            raise ExitException(EXITCODE_TYPST_COMPILE_ERROR)
+        return process.stdout.decode("utf-8")
+
+    # Queries are of a compiler's own input, which the `session` doesn't keep
+    compiler = typst.Compiler(
+        input=typst_content.encode("utf-8"),
+        font_paths=project_fonts(),
+        package_path=get_typst_packages_dir(),
+    )
+    try:
+        with profiling.span("typst query", "typst"):
+            return compiler.query(selector, field=field, one=True)
+    except RuntimeError as e:
+        log.error(str(e), extra={"raw": True})
+        log.error("Typst query error. Please check the output for more information.")
+        raise ExitException(EXITCODE_TYPST_COMPILE_ERROR)
+
+
+def install():
+    """Compile Typst with the project fonts, through this cache."""
+    typst_item.compile_typst = compile_typst
+
+
+def _store(svg_file_path: str, svg: bytes):
+    tmp_file_path = f"{svg_file_path[:-4]}.{os.getpid()}.tmp.svg"
+    with open(tmp_file_path, "wb") as f:
+        f.write(svg)
+    os.replace(tmp_file_path, svg_file_path)
+
+
+def uncached(preamble: str, bodies: List[str]) -> Dict[str, str]:
+    """The bodies not compiled after `preamble` yet, by cache key."""
+    shared_preamble = Config.get.typst_shared_preamble
+    additional_preamble = Config.get.typst_text_preamble
+
+    pending: Dict[str, str] = {}
+    for body in bodies:
+        key = source_key(preamble + body, shared_preamble, additional_preamble, "", {})
+        if not os.path.exists(cache_path("typst", key + ".svg")):
+            pending[key] = body
+    return pending
+
+
+def compile_pages(preamble: str, bodies: List[str]) -> List[str]:
+    """Compile `preamble + body` for every body as the pages of one Typst
+    document, caching each page as if `TypstText(preamble + body)` had been
+    compiled on its own. Pages come out identical to separate compilations,
+    this only saves the per-document compiler setup.
+
+    Must be called while a timeline is being built, as the cache key depends on
+    the janim config. Anything that can't be batched is left to be compiled
+    lazily, where errors are reported as usual.
+
+    Returns the cache keys of the pages it compiled.
+    """
+    if tc._flag_use_external_typst:
+        return []
+
+    shared_preamble = Config.get.typst_shared_preamble
+    additional_preamble = Config.get.typst_text_preamble
+
+    pending = uncached(preamble, bodies)
+    if not pending:
+        return []
+
+    typst_content = tc.get_typst_template().format(
+        shared_preamble=shared_preamble,
+        additional_preamble=additional_preamble,
+        vars="",
+        typst_expression=preamble + "\n#pagebreak()\n".join(pending.values()),
+    )
+
+    try:
+        with profiling.span("typst pages", "typst", pages=len(pending)):
+            pages = compile_svg(typst_content, {})
+    except typst.TypstError as e:
+        log.debug(
+            f"Batch of {len(pending)} Typst sources failed, compiling them one at a time: "
+            + e.diagnostic.removesuffix("\n")
+        )
+        return []
+    stats.compilations += 1
+
+    if isinstance(pages, bytes):
+        pages = [pages]
+    if len(pages) != len(pending):
+        log.warning(f"Batched {len(pending)} Typst sources into {len(pages)} pages")
+        return []
+
+    for key, svg in zip(pending, pages):
+        _store(cache_path("typst", key + ".svg"), svg)
+    return list(pending)
+
+
+def untypeset(preamble: str, bodies: List[str]) -> List[str]:
+    """The bodies after `preamble` not compiled, or compiled but not parsed
+    into the geometry store, yet."""
+    shared_preamble = Config.get.typst_shared_preamble
+    additional_preamble = Config.get.typst_text_preamble
+
+    pending: List[str] = []
+    for body in bodies:
+        key = source_key(preamble + body, shared_preamble, additional_preamble, "", {})
+        path = cache_path("typst", key + ".svg")
+        stored = geometry.geometry_key(path, typst_item.TypstText.group_key, False)
+        if not os.path.exists(path) or not geometry.is_stored(stored):
+            pending.append(body)
+    return pending
+
+
+# Below this many pages per worker, starting the workers costs more than they
+# save: parsing a page takes some 30 ms, starting a worker a second or so,
+# though only once a process
+PARALLEL_PAGES = 24
+
+
+def compile_sources(sources: Dict[str, List[str]]):
+    """Compile the bodies after each preamble in `sources` as `compile_pages`
+    does, one document per preamble.
+
+    With enough pages left to parse, they are shared out over the worker
+    `pool` instead, each worker compiling its share of every preamble and
+    parsing the pages into the geometry store, for timelines to load."""
+    pending = {preamble: untypeset(preamble, bodies) for preamble, bodies in sources.items()}
+    workers = workers_for(sum(map(len, pending.values())), PARALLEL_PAGES)
+    if workers > 1:
+        batches = [
+            {preamble: bodies[i::workers] for preamble, bodies in pending.items()}
+            for i in range(workers)
+        ]
+        for compilations, events in pool().map(_typeset_batch, batches, repeat(preambles())):
+            claim(compilations, events)
+    # Whatever the workers typeset is cached by now
+    for preamble, bodies in sources.items():
+        compile_pages(preamble, bodies)
+
+
+def preambles() -> Tuple[str, str]:
+    """What of the janim config the cache keys depend on, for workers, which
+    don't share the timeline's."""
+    return Config.get.typst_shared_preamble, Config.get.typst_text_preamble
+
+
+def _start_worker():
+    # Workers don't start pools of their own
+    os.environ["NIRUKTA_WORKERS"] = "1"
+    install()
+    geometry.install()
+    profiling.install()
+
+
+def workers_for(work: int, share: int) -> int:
+    """How many workers to spread `work` over, so that each gets at least
+    `share` of it. None when janim compiles with an external Typst, which the
+    workers wouldn't know to."""
+    if tc._flag_use_external_typst:
+        return 0
+    return min(worker_count(), work // share)
+
+
+@cache
+def pool() -> ProcessPoolExecutor:
+    """Workers that typeset for this process, kept up for as long as it runs
+    (`NIRUKTA_WORKERS`, one per core by default)."""
+    return process_pool(worker_count(), initializer=_start_worker)
+
+
+def typeset(sources: Dict[str, List[str]], preambles: Tuple[str, str]) -> int:
+    """In a worker, compile the bodies after each preamble in `sources` as
+    `compile_pages` does, and parse every page into the geometry store for
+    the parent to load. Returns the Typst invocations it took."""
+    before = stats.compilations
+    shared_preamble, text_preamble = preambles
+    with Config(typst_shared_preamble=shared_preamble, typst_text_preamble=text_preamble):
+        for preamble, bodies in sources.items():
+            compile_pages(preamble, bodies)
+            for body in bodies:
+                key = source_key(preamble + body, shared_preamble, text_preamble, "", {})
+                path = cache_path("typst", key + ".svg")
+                # Unless the batch failed, to be compiled lazily after all
+                if os.path.exists(path):
+                    typst_item.TypstText.get_items_from_file(path)
+    # Whatever was parsed is in the store, janim needn't keep it too
+    SVGItem.vitem_builders_map.clear()
+    return stats.compilations - before
+
+
+def _typeset_batch(
+    sources: Dict[str, List[str]], preambles: Tuple[str, str]
+) -> Tuple[int, List[dict]]:
+    # Profiled spans go back with the result, see `profiling.drain`
+    return typeset(sources, preambles), profiling.drain()
+
+
+def claim(compilations: int, events: List[dict]):
+    """Account for what a worker typeset on this process's behalf."""
+    stats.compilations += compilations
+    profiling.merge(events)
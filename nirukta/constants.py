@@ -1,22 +1,29 @@
+import os
 import re
 
-from janim.imports import (
-    BLUE,
-    GREEN,
-    MAROON,
-    ORANGE,
-    PINK,
-    RED,
-    TEAL,
-    YELLOW,
-    GREY,
-)
+# janim's palette, spelled out so that the models don't have to load janim
+RED = "#FC6255"
+BLUE = "#58C4DD"
+YELLOW = "#FFFF00"
+GREEN = "#83C167"
+PINK = "#D147BD"
+ORANGE = "#FF862F"
+TEAL = "#5CD0B3"
+MAROON = "#C55F73"
+GREY = "#888888"
+WHITE = "#FFFFFF"
 
 SCALE = 1.3
 INTRO_FONT = "Tiro Devanagari Sanskrit"
 SANSKRIT_FONT = "Tiro Devanagari Sanskrit"
 LATIN_FONT = "Junicode"
 
+FONT_DIR = os.path.join(os.path.dirname(__file__), "..", "fonts")
+LIBRARY_DIR = os.path.join(os.path.dirname(__file__), "..", "library")
+CACHE_DIR = os.environ.get(
+    "NIRUKTA_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache")
+)
+
 COLORS = [RED, BLUE, YELLOW, GREEN, PINK, ORANGE, TEAL, MAROON]
 
 # Typst Commands
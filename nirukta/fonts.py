@@ -0,0 +1,161 @@
+"""The project fonts, registered with janim from metadata cached on disk.
+
+janim finds fonts by family and full name. Reading those names means parsing
+every font file with fontTools, so they are cached by file size and mtime,
+and only added to janim's font database once it is first used.
+"""
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List
+
+import janim.utils.font.database as database
+from fontTools.ttLib import TTCollection, TTFont, TTLibError
+from janim.utils.font.database import FontDatabase, FontInfo
+from janim.utils.font.exception import EXCEPTION_MAP
+from janim.utils.font_manager import get_fontext_synonyms, list_fonts
+from janim.utils.font.variant import Style
+
+from nirukta.cache import cache_path
+from nirukta.constants import FONT_DIR
+
+
+@dataclass
+class FontMetadata:
+    filepath: str
+    index: int
+    family_name: str
+    full_name: str
+    postscript_name: str
+    weight: int
+    style: Style
+
+
+def font_files() -> List[str]:
+    return sorted(list_fonts(FONT_DIR, get_fontext_synonyms("ttf")))
+
+
+def read_metadata(filepath: str) -> List[FontMetadata]:
+    try:
+        fonts = (
+            TTCollection(filepath, lazy=True).fonts
+            if filepath.endswith("ttc")
+            else [TTFont(filepath, lazy=True)]
+        )
+    except TTLibError:
+        return []
+
+    metadata = []
+    for i, font in enumerate(fonts):
+        info = FontInfo(filepath, font, i)
+        metadata.append(
+            FontMetadata(
+                filepath,
+                i,
+                info.family_name,
+                info.full_name,
+                info.postscript_name,
+                info.weight,
+                info.style,
+            )
+        )
+    return metadata
+
+
+def font_metadata(filepath: str) -> List[FontMetadata]:
+    """The metadata of every font in `filepath`, read once per version of the
+    file."""
+    st = os.stat(filepath)
+    key = hashlib.md5(
+        f"{os.path.abspath(filepath)}:{st.st_size}:{st.st_mtime_ns}".encode()
+    ).hexdigest()
+    path = cache_path("fonts", key + ".pkl")
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    metadata = read_metadata(filepath)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(metadata, f)
+    os.replace(tmp_path, path)
+    return metadata
+
+
+class CachedFontInfo(FontInfo):
+    """A `FontInfo` that only opens its font when the font's tables are asked
+    for."""
+
+    def __init__(self, metadata: FontMetadata):
+        self.filepath = metadata.filepath
+        self.index = metadata.index
+        self.metadata = metadata
+        self.exception = EXCEPTION_MAP.get(metadata.postscript_name, None)
+
+    @cached_property
+    def font(self) -> TTFont:
+        if self.filepath.endswith("ttc"):
+            return TTCollection(self.filepath, lazy=True).fonts[self.index]
+        return TTFont(self.filepath, lazy=True)
+
+    @cached_property
+    def name(self):  # type: ignore[override]
+        return self.font["name"]
+
+    @cached_property
+    def os2(self):  # type: ignore[override]
+        return self.font.get("OS/2", None)
+
+    @property
+    def family_name(self) -> str:
+        return self.metadata.family_name
+
+    @property
+    def full_name(self) -> str:
+        return self.metadata.full_name
+
+    @property
+    def postscript_name(self) -> str:
+        return self.metadata.postscript_name
+
+    @property
+    def weight(self) -> int:
+        return self.metadata.weight
+
+    @property
+    def style(self) -> Style:
+        return self.metadata.style
+
+
+def register(db: FontDatabase):
+    for filepath in font_files():
+        for metadata in font_metadata(filepath):
+            info = CachedFontInfo(metadata)
+            db.family_by_name[info.family_name].add(info)
+            db.font_by_full_name[info.full_name] = info
+
+
+def install():
+    """Add the project fonts to janim's font database once it is loaded,
+    which janim does when text is first rendered."""
+    if getattr(database, "_nirukta_fonts_patched", False):
+        return
+
+    get_database = database.get_database
+
+    def get_database_with_project_fonts() -> FontDatabase:
+        loaded = database._database is not None
+        db = get_database()
+        if not loaded:
+            register(db)
+        return db
+
+    if database._database is not None:
+        register(database._database)
+    database.get_database = get_database_with_project_fonts
+    database._nirukta_fonts_patched = True  # type: ignore[attr-defined]
@@ -1,39 +1,71 @@
-from __future__ import annotations
+"""Formats .sloka and .sutra files into their canonical layout.
 
-import sys
+    python -m nirukta.format [path or glob ...] [--check] [--workers N]
+    python -m nirukta.format - < file.sloka
 
-from typing import Union
+Files whose contents were formatted before are skipped by content hash, and
+the rest are spread over a pool of worker processes when there are many.
+"""
 
-from parser import CompoundToken, Gloss, Line, SimpleToken, SlokaFile, Utterance, parse
+from __future__ import annotations
 
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Union
 
-TokenType = Union[SimpleToken, CompoundToken, str]
+from nirukta.cache import cache_path, code_fingerprint
+from nirukta.constants import LIBRARY_DIR
+from nirukta.models import (
+    CompoundToken,
+    EnglishGloss,
+    Gloss,
+    Line,
+    SimpleToken,
+    Sloka,
+    SlokaFile,
+    TokenType,
+    Utterance,
+)
+from nirukta.parsing.descent import DescentParser
+from nirukta.pool import process_pool, worker_count
+
+# Below this many files starting the workers costs more than it saves
+PARALLEL_FILES = 16
 
 # ---------------------------------------------------------------------------
 # Serialiser
 # ---------------------------------------------------------------------------
 
 
-def fmt_gloss(g: Gloss) -> str:
-    return ("{" + g.text + "}") if g.etymological else ("[" + g.text + "]")
+def fmt_gloss(g: Optional[Gloss]) -> str:
+    if isinstance(g, EnglishGloss):
+        return "[" + g.text + "]"
+    elif g is None:
+        # The parser keeps glosses it can't read as None, writing them back
+        # would lose them
+        raise ValueError("invalid etymological gloss")
+    return "{" + g.notation + "}"
 
 
 def fmt_simple(token: SimpleToken) -> str:
     return token.slp1 + "".join(fmt_gloss(g) for g in token.glosses)
 
 
-def fmt_comp_part(token: TokenType) -> str:
+def fmt_comp_part(token: Union[SimpleToken, CompoundToken]) -> str:
     if isinstance(token, CompoundToken):
         return "(" + fmt_compound(token) + ")"
-    elif isinstance(token, SimpleToken):
-        return fmt_simple(token)
-    else:
-        return token
+    return fmt_simple(token)
 
 
 def fmt_compound(token: CompoundToken) -> str:
     parts = "+".join(fmt_comp_part(p) for p in token.parts)
-    return f"{parts}={token.slp1}"
+    gloss = "" if token.etym_gloss is None else fmt_gloss(token.etym_gloss)
+    return f"{parts}={token.slp1}{gloss}"
 
 
 def fmt_token(token: TokenType) -> str:
@@ -45,19 +77,17 @@ def fmt_token(token: TokenType) -> str:
         return fmt_compound(token)
 
 
+def fmt_quoted(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 def fmt_verse_line(vline: Utterance) -> str:
     # Every token (including punctuation) is separated by a single space.
-    # The first token has no leading space; all subsequent ones do.
-    parts: list[str] = []
-    for tok in vline.tokens:
-        serialised = fmt_token(tok)
-        parts.append(serialised if not parts else " " + serialised)
-
-    token_line = "".join(parts)
+    token_line = " ".join(fmt_token(tok) for tok in vline.tokens)
 
     # Multiple quoted strings are stored joined by "#linebreak()" — split back.
     english_parts = vline.english.split("#linebreak()")
-    quoted_lines = "\n".join(f'"{p}"' for p in english_parts)
+    quoted_lines = "\n".join(fmt_quoted(p) for p in english_parts)
 
     return token_line + "\n" + quoted_lines
 
@@ -68,29 +98,172 @@ def fmt_line(line: Line) -> str:
     return "\n--- line ---\n" + body
 
 
+def fmt_lines(sloka: Sloka) -> str:
+    return "\n".join(fmt_line(ln) for ln in sloka.lines) + "\n"
+
+
 def fmt_sloka(sloka: SlokaFile) -> str:
-    header = f"=== {sloka.citation} ==="
-    lines = "\n".join(fmt_line(ln) for ln in sloka.lines)
-    return header + "\n" + lines + "\n"
+    return f"=== {sloka.citation} ===\n" + fmt_lines(sloka.sloka)
+
+
+def fmt_sutra(citation: str, slokas: List[Union[Sloka, str]]) -> str:
+    blocks = [
+        "\n=== sloka ===\n"
+        + (f"file:{sloka}\n" if isinstance(sloka, str) else fmt_lines(sloka))
+        for sloka in slokas
+    ]
+    return f"=== {citation} ===\n" + "".join(blocks)
 
 
 # ---------------------------------------------------------------------------
-# CLI entry-point
+# Parsing
 # ---------------------------------------------------------------------------
 
 
-def main() -> None:
-    if len(sys.argv) == 2:
-        path = sys.argv[1]
-        with open(path, "r", encoding="utf-8") as fh:
-            source = fh.read()
-        result = fmt_sloka(parse(source))
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write(result)
-    else:
+def parse_sloka(source: str) -> SlokaFile:
+    parsed = DescentParser(source).sloka_file()
+    if parsed is None:
+        # Have the grammar report the error
+        from nirukta.parsing import SlokaVisitor
+        from nirukta.parsing import grammars
+
+        parsed = SlokaVisitor("", source).visit(grammars.SLOKA_GRAMMAR.parse(source))
+    return parsed
+
+
+def parse_sutra(source: str) -> tuple[str, List[Union[Sloka, str]]]:
+    """The citation and slokas of a sutra, with included slokas left as the
+    paths they are included by, which is how they are written back."""
+    parsed = DescentParser(source).sutra()
+    if parsed is None:
+        from nirukta.parsing import SutraVisitor
+        from nirukta.parsing import grammars
+
+        class SutraSourceVisitor(SutraVisitor):
+            def resolve(self, citation, raw_slokas):  # type: ignore[override]
+                return citation, raw_slokas
+
+        parsed = SutraSourceVisitor("", source).visit(grammars.SUTRA_GRAMMAR.parse(source))
+    return parsed  # type: ignore[return-value]
+
+
+def is_sutra(path: str, source: str) -> bool:
+    if path == "-":
+        return "=== sloka ===" in source
+    return path.endswith(".sutra")
+
+
+def format_source(source: str, sutra: bool) -> str:
+    # The etymological gloss parser reports every gloss it reads
+    with contextlib.redirect_stdout(io.StringIO()):
+        if sutra:
+            return fmt_sutra(*parse_sutra(source))
+        return fmt_sloka(parse_sloka(source))
+
+
+# ---------------------------------------------------------------------------
+# Bulk formatting
+# ---------------------------------------------------------------------------
+
+
+def formatted_marker(source: str) -> str:
+    """Path of the file marking `source` as already formatted, by the current
+    code."""
+    md5 = hashlib.md5(code_fingerprint().encode())
+    md5.update(source.encode())
+    return cache_path("formatted", md5.hexdigest())
+
+
+def mark_formatted(source: str):
+    open(formatted_marker(source), "w").close()
+
+
+@dataclass
+class Result:
+    path: str
+    changed: bool
+    error: Optional[str] = None
+
+
+def format_file(path: str, check: bool) -> Result:
+    try:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        formatted = format_source(source, is_sutra(path, source))
+    except Exception as e:
+        message = str(e).strip().splitlines()
+        return Result(path, False, f"{type(e).__name__}: {message[0] if message else ''}")
+
+    if formatted == source:
+        mark_formatted(source)
+        return Result(path, False)
+    if not check:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(formatted)
+        mark_formatted(formatted)
+    return Result(path, True)
+
+
+def needs_formatting(path: str) -> bool:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return not os.path.exists(formatted_marker(f.read()))
+    except OSError:
+        return True
+
+
+def format_files(files: List[str], check: bool, workers: int) -> List[Result]:
+    if workers <= 1 or len(files) < PARALLEL_FILES:
+        return [format_file(path, check) for path in files]
+
+    with process_pool(workers) as pool:
+        chunksize = max(1, len(files) // (4 * workers))
+        return list(pool.map(format_file, files, [check] * len(files), chunksize=chunksize))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from nirukta.batch import nirukta_files
+
+    parser = argparse.ArgumentParser(
+        prog="python -m nirukta.format", description="Format .sloka and .sutra files."
+    )
+    parser.add_argument(
+        "patterns",
+        nargs="*",
+        default=[LIBRARY_DIR],
+        help="files, directories or globs, - to format stdin to stdout",
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="report files that would change, without writing"
+    )
+    parser.add_argument("--workers", type=int, default=worker_count())
+    args = parser.parse_args(argv)
+
+    if args.patterns == ["-"]:
         source = sys.stdin.read()
-        sys.stdout.write(fmt_sloka(parse(source)))
+        sys.stdout.write(format_source(source, is_sutra("-", source)))
+        return 0
+
+    files = nirukta_files(args.patterns)
+    todo = [path for path in files if needs_formatting(path)]
+    results = format_files(todo, args.check, args.workers)
+
+    for result in results:
+        if result.error is not None:
+            print(f"error: {result.path}: {result.error}", file=sys.stderr)
+        elif result.changed:
+            print(f"{'would reformat' if args.check else 'reformatted'} {result.path}")
+
+    changed = sum(result.changed for result in results)
+    failed = sum(result.error is not None for result in results)
+    print(
+        f"{changed} {'would be ' if args.check else ''}reformatted, "
+        f"{len(files) - changed - failed} unchanged ({len(files) - len(todo)} cached), "
+        f"{failed} failed",
+        file=sys.stderr,
+    )
+    return 1 if failed or (args.check and changed) else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
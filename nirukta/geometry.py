@@ -0,0 +1,155 @@
+"""The items janim parses out of compiled Typst, stored on disk as arrays.
+
+Parsing an SVG into items costs far more than compiling it, and janim only
+remembers what it parsed for the life of the process. Items parsed from
+nirukta's Typst cache are stored by the same source hash as the SVG: the
+points of every item in one `.npy` file, memory-mapped on load so that each
+item copies only its own segment out of the page cache shared by every
+process, and the rest (colors, stroke radii, marks and labels) alongside it.
+"""
+
+import os
+import pickle
+from dataclasses import dataclass
+from importlib.metadata import version
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from janim.items.svg.svg_item import SVGItem
+from janim.items.group import Group
+from janim.items.text import BasepointVItem
+from janim.items.vitem import VItem
+
+from nirukta.cache import cache_path
+
+# Items of any other kind are left to janim to parse every time
+KINDS = {VItem: "vitem", BasepointVItem: "basepoint"}
+ITEM_KINDS = {kind: cls for cls, kind in KINDS.items()}
+
+
+@dataclass
+class StoredItem:
+    kind: str
+    # The item's points are rows start:end of the stored points
+    start: int
+    end: int
+    radii: np.ndarray
+    stroke: np.ndarray
+    fill: np.ndarray
+    marks: Optional[np.ndarray]
+
+
+@dataclass
+class Geometry:
+    items: List[StoredItem]
+    # Indices of the items under each label
+    groups: Dict[str, List[int]]
+
+
+def geometry_key(file_path: str, group_key: Optional[str], mark_basepoint: bool) -> Optional[str]:
+    """Where the items parsed from `file_path` are stored, if it was compiled
+    by nirukta and so named after its source."""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    if directory != os.path.dirname(os.path.abspath(cache_path("typst", name))):
+        return None
+    # janim's parser is part of what the items depend on
+    return f"{os.path.splitext(name)[0]}-{group_key}-{int(mark_basepoint)}-{version('janim')}"
+
+
+_loaded: Dict[str, Tuple[Geometry, np.ndarray]] = {}
+
+
+def load(key: str) -> Optional[Tuple[Geometry, np.ndarray]]:
+    if key in _loaded:
+        return _loaded[key]
+    try:
+        with open(cache_path("geometry", key + ".pkl"), "rb") as f:
+            geometry = pickle.load(f)
+        points = np.load(cache_path("geometry", key + ".npy"), mmap_mode="r")
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    _loaded[key] = geometry, points
+    return _loaded[key]
+
+
+def is_stored(key: str) -> bool:
+    # The index is written last, see `store`
+    return os.path.exists(cache_path("geometry", key + ".pkl"))
+
+
+def store(key: str, items: List[VItem], groups: Dict[str, List[VItem]]):
+    if any(type(item) not in KINDS for item in items):
+        return
+
+    stored: List[StoredItem] = []
+    start = 0
+    for item in items:
+        end = start + len(item.points.get())
+        stored.append(
+            StoredItem(
+                KINDS[type(item)],
+                start,
+                end,
+                item.radius.get(),
+                item.stroke.get(),
+                item.fill.get(),
+                item.mark.get_points() if isinstance(item, BasepointVItem) else None,
+            )
+        )
+        start = end
+    index = {id(item): i for i, item in enumerate(items)}
+    geometry = Geometry(
+        stored, {label: [index[id(item)] for item in group] for label, group in groups.items()}
+    )
+
+    # The points first, the index last: whatever finds the index finds its
+    # points, and neither is ever seen half-written
+    path = cache_path("geometry", key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path + ".npy", "wb") as f:
+        np.save(f, np.concatenate([item.points.get() for item in items] or [np.zeros((0, 3))]))
+    os.replace(tmp_path + ".npy", path + ".npy")
+    with open(tmp_path + ".pkl", "wb") as f:
+        pickle.dump(geometry, f)
+    os.replace(tmp_path + ".pkl", path + ".pkl")
+
+
+def build(geometry: Geometry, points: np.ndarray) -> Tuple[List[VItem], Dict[str, Group]]:
+    items: List[VItem] = []
+    for stored in geometry.items:
+        item = ITEM_KINDS[stored.kind]()
+        item.points.set(points[stored.start : stored.end])
+        item.radius.set(stored.radii)
+        item.stroke.set_rgbas(stored.stroke)
+        item.fill.set_rgbas(stored.fill)
+        if stored.marks is not None:
+            item.mark.set_points(stored.marks)
+        items.append(item)
+    groups = {
+        label: Group.from_iterable(items[i] for i in indices)
+        for label, indices in geometry.groups.items()
+    }
+    return items, groups
+
+
+def install():
+    """Have janim load the items of compiled Typst from the store, and store
+    whatever it has to parse."""
+    if getattr(SVGItem, "_geometry_stored", False):
+        return
+
+    parse = SVGItem.get_items_from_file.__func__  # type: ignore[attr-defined]
+
+    def stored_get_items_from_file(cls, file_path: str, mark_basepoint: bool = False):
+        key = geometry_key(file_path, cls.group_key, mark_basepoint)
+        if key is None:
+            return parse(cls, file_path, mark_basepoint)
+        if (loaded := load(key)) is not None:
+            return build(*loaded)
+
+        items, groups = parse(cls, file_path, mark_basepoint)
+        store(key, items, groups)
+        return items, groups
+
+    SVGItem.get_items_from_file = classmethod(stored_get_items_from_file)  # type: ignore[method-assign]
+    SVGItem._geometry_stored = True  # type: ignore[attr-defined]
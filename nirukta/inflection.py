@@ -39,17 +39,12 @@ class Case(Enum):
 
     @classmethod
     def parse(cls, text: str) -> "Case":
-        case_map = {
-            "NOM": Case.NOMINATIVE,
-            "ACC": Case.ACCUSATIVE,
-            "INS": Case.INSTRUMENTAL,
-            "DAT": Case.DATIVE,
-            "ABL": Case.ABLATIVE,
-            "GEN": Case.GENITIVE,
-            "LOC": Case.LOCATIVE,
-            "VOC": Case.VOCATIVE,
-        }
-        return case_map[text]
+        return CASE_NOTATION[text]
+
+    @property
+    def notation(self) -> str:
+        """The abbreviation `parse` reads this case from."""
+        return ABBREVIATIONS[self]
 
 
 class Person(Enum):
@@ -95,6 +90,81 @@ class CompoundType(Enum):
     DVIGU = "dvigu"
 
 
+# The abbreviations of the compact notation, see `SanskritInflection.parse`
+
+POS_NOTATION = {
+    "V": PartOfSpeech.VERB,
+    "N": PartOfSpeech.NOUN,
+    "ADJ": PartOfSpeech.ADJECTIVE,
+    "PRON": PartOfSpeech.PRONOUN,
+    "PTCP": PartOfSpeech.PARTICIPLE,
+    "IND": PartOfSpeech.INDECLINABLE,
+    "COMP": PartOfSpeech.COMPOUND,
+}
+GENDER_NOTATION = {"M": Gender.MASCULINE, "F": Gender.FEMININE, "N": Gender.NEUTER}
+NUMBER_NOTATION = {"SG": Number.SINGULAR, "DU": Number.DUAL, "PL": Number.PLURAL}
+CASE_NOTATION = {
+    "NOM": Case.NOMINATIVE,
+    "ACC": Case.ACCUSATIVE,
+    "INS": Case.INSTRUMENTAL,
+    "DAT": Case.DATIVE,
+    "ABL": Case.ABLATIVE,
+    "GEN": Case.GENITIVE,
+    "LOC": Case.LOCATIVE,
+    "VOC": Case.VOCATIVE,
+}
+PERSON_NOTATION = {"1": Person.FIRST, "2": Person.SECOND, "3": Person.THIRD}
+TENSE_NOTATION = {
+    "PRES": Tense.PRESENT,
+    "IMPF": Tense.IMPERFECT,
+    "PERF": Tense.PERFECT,
+    "AOR": Tense.AORIST,
+    "FUT": Tense.FUTURE,
+    "COND": Tense.CONDITIONAL,
+    "IMP": Tense.IMPERATIVE,
+    "OPT": Tense.OPTATIVE,
+}
+VOICE_NOTATION = {
+    "PAR": Voice.PARASMAIPADA,
+    "ATM": Voice.ATMANEPADA,
+    "PASS": Voice.PASSIVE,
+}
+PARTICIPLE_NOTATION = {
+    "PRP": ParticipleType.PRESENT_ACTIVE,
+    "PRM": ParticipleType.PRESENT_MIDDLE,
+    "PPP": ParticipleType.PAST_PASSIVE,
+    "PPA": ParticipleType.PAST_ACTIVE,
+    "FUT": ParticipleType.FUTURE_ACTIVE,
+    "GRD": ParticipleType.GERUNDIVE,
+    "ABS": ParticipleType.ABSOLUTIVE,
+}
+COMPOUND_NOTATION = {
+    "TP": CompoundType.TATPURUSHA,
+    "BV": CompoundType.BAHUVRIHI,
+    "DV": CompoundType.DVANDVA,
+    "KD": CompoundType.KARMADHARAYA,
+    "AV": CompoundType.AVYAYIBHAVA,
+    "DG": CompoundType.DVIGU,
+}
+
+# Every value's abbreviation, for writing an inflection back out
+ABBREVIATIONS: dict[Enum, str] = {
+    value: abbreviation
+    for notation in (
+        POS_NOTATION,
+        GENDER_NOTATION,
+        NUMBER_NOTATION,
+        CASE_NOTATION,
+        PERSON_NOTATION,
+        TENSE_NOTATION,
+        VOICE_NOTATION,
+        PARTICIPLE_NOTATION,
+        COMPOUND_NOTATION,
+    )
+    for abbreviation, value in notation.items()
+}
+
+
 @dataclass
 class SanskritInflection:
     """
@@ -224,64 +294,7 @@ class SanskritInflection:
         """
         parts = notation.upper().split(".")
 
-        # Mapping shortcuts to enums
-        pos_map = {
-            "V": PartOfSpeech.VERB,
-            "N": PartOfSpeech.NOUN,
-            "ADJ": PartOfSpeech.ADJECTIVE,
-            "PRON": PartOfSpeech.PRONOUN,
-            "PTCP": PartOfSpeech.PARTICIPLE,
-            "IND": PartOfSpeech.INDECLINABLE,
-            "COMP": PartOfSpeech.COMPOUND,
-        }
-
-        gender_map = {"M": Gender.MASCULINE, "F": Gender.FEMININE, "N": Gender.NEUTER}
-        number_map = {"SG": Number.SINGULAR, "DU": Number.DUAL, "PL": Number.PLURAL}
-        # case_map = {
-        #     "NOM": Case.NOMINATIVE,
-        #     "ACC": Case.ACCUSATIVE,
-        #     "INS": Case.INSTRUMENTAL,
-        #     "DAT": Case.DATIVE,
-        #     "ABL": Case.ABLATIVE,
-        #     "GEN": Case.GENITIVE,
-        #     "LOC": Case.LOCATIVE,
-        #     "VOC": Case.VOCATIVE,
-        # }
-        person_map = {"1": Person.FIRST, "2": Person.SECOND, "3": Person.THIRD}
-        tense_map = {
-            "PRES": Tense.PRESENT,
-            "IMPF": Tense.IMPERFECT,
-            "PERF": Tense.PERFECT,
-            "AOR": Tense.AORIST,
-            "FUT": Tense.FUTURE,
-            "COND": Tense.CONDITIONAL,
-            "IMP": Tense.IMPERATIVE,
-            "OPT": Tense.OPTATIVE,
-        }
-        voice_map = {
-            "PAR": Voice.PARASMAIPADA,
-            "ATM": Voice.ATMANEPADA,
-            "PASS": Voice.PASSIVE,
-        }
-        ptcp_map = {
-            "PRP": ParticipleType.PRESENT_ACTIVE,
-            "PRM": ParticipleType.PRESENT_MIDDLE,
-            "PPP": ParticipleType.PAST_PASSIVE,
-            "PPA": ParticipleType.PAST_ACTIVE,
-            "FUT": ParticipleType.FUTURE_ACTIVE,
-            "GRD": ParticipleType.GERUNDIVE,
-            "ABS": ParticipleType.ABSOLUTIVE,
-        }
-        compound_map = {
-            "TP": CompoundType.TATPURUSHA,
-            "BV": CompoundType.BAHUVRIHI,
-            "DV": CompoundType.DVANDVA,
-            "KD": CompoundType.KARMADHARAYA,
-            "AV": CompoundType.AVYAYIBHAVA,
-            "DG": CompoundType.DVIGU,
-        }
-
-        pos = pos_map[parts[0]]
+        pos = POS_NOTATION[parts[0]]
 
         if pos == PartOfSpeech.INDECLINABLE:
             return cls(pos=pos, **kwargs)
@@ -290,19 +303,19 @@ class SanskritInflection:
         if pos == PartOfSpeech.VERB:
             return cls(
                 pos=pos,
-                person=person_map[parts[1]],
-                number=number_map[parts[2]],
-                tense=tense_map[parts[3]],
-                voice=voice_map[parts[4]],
+                person=PERSON_NOTATION[parts[1]],
+                number=NUMBER_NOTATION[parts[2]],
+                tense=TENSE_NOTATION[parts[3]],
+                voice=VOICE_NOTATION[parts[4]],
                 **kwargs,
             )
 
         elif pos == PartOfSpeech.PARTICIPLE:
             return cls(
                 pos=pos,
-                participle_type=ptcp_map[parts[1]],
-                gender=gender_map[parts[2]],
-                number=number_map[parts[3]],
+                participle_type=PARTICIPLE_NOTATION[parts[1]],
+                gender=GENDER_NOTATION[parts[2]],
+                number=NUMBER_NOTATION[parts[3]],
                 case=Case.parse(parts[4]),
                 **kwargs,
             )
@@ -310,9 +323,9 @@ class SanskritInflection:
         elif pos == PartOfSpeech.COMPOUND:
             return cls(
                 pos=pos,
-                compound_type=compound_map[parts[1]],
-                gender=gender_map[parts[2]],
-                number=number_map[parts[3]],
+                compound_type=COMPOUND_NOTATION[parts[1]],
+                gender=GENDER_NOTATION[parts[2]],
+                number=NUMBER_NOTATION[parts[3]],
                 case=Case.parse(parts[4]),
                 **kwargs,
             )
@@ -320,8 +333,23 @@ class SanskritInflection:
         else:  # Noun, Pronoun, Adjective
             return cls(
                 pos=pos,
-                gender=gender_map[parts[1]],
-                number=number_map[parts[2]],
+                gender=GENDER_NOTATION[parts[1]],
+                number=NUMBER_NOTATION[parts[2]],
                 case=Case.parse(parts[3]),
                 **kwargs,
             )
+
+    @property
+    def notation(self) -> str:
+        """This inflection in the compact notation `parse` reads."""
+        if self.pos == PartOfSpeech.INDECLINABLE:
+            parts = []
+        elif self.pos == PartOfSpeech.VERB:
+            parts = [self.person, self.number, self.tense, self.voice]
+        elif self.pos == PartOfSpeech.PARTICIPLE:
+            parts = [self.participle_type, self.gender, self.number, self.case]
+        elif self.pos == PartOfSpeech.COMPOUND:
+            parts = [self.compound_type, self.gender, self.number, self.case]
+        else:
+            parts = [self.gender, self.number, self.case]
+        return ".".join(ABBREVIATIONS[part] for part in [self.pos, *parts])  # type: ignore[index]
@@ -0,0 +1,217 @@
+"""Frames of tokens composed from glyphs typeset once per distinct token, and
+recolored rather than typeset again.
+
+The tokens of a frame are `#box`es separated by spaces, which Typst lays out
+as unbreakable words: each as wide as the page it typesets to on its own, on
+left-aligned lines no wider than the text area and `par.leading` apart. Laying
+them out the same way places every token's glyphs where typesetting the whole
+frame would, while each distinct token is only compiled and parsed once.
+
+Tokens are typeset in white, and their glyphs filled with the token's color
+once placed. Text that only changes color between frames is handled the same
+way, see `recolored`.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import cache
+from typing import Dict, Iterable, List, Tuple
+
+import janim.utils.typst_compile as tc
+from janim.constants import FRAME_PPI
+from janim.imports import WHITE, Color, Config, Group, SVGItem, TypstText, VItem, np
+
+from nirukta import compiler
+from nirukta.cache import cache_path
+from nirukta.render import set_font
+
+# A token's label, the Typst code that typesets it in white, and its color
+type TokenSource = Tuple[str, str, str]
+
+METRICS_LABEL = "nirukta-metrics"
+METRICS_SOURCE = (
+    "#layout(size => [#metadata(("
+    "width: size.width.pt(), "
+    "leading: par.leading.to-absolute().pt(), "
+    "space: measure([#box[] #box[]]).width.pt()"
+    f"))<{METRICS_LABEL}>])"
+)
+
+SVG_SIZE_RE = re.compile(rb'<svg[^>]*\swidth="([\d.]+)pt"\s+height="([\d.]+)pt"')
+
+
+@dataclass
+class Metrics:
+    """How Typst lays out a paragraph in a font, in pt."""
+
+    width: float
+    leading: float
+    space: float
+
+
+_metrics: Dict[str, Metrics] = {}
+
+
+def metrics(font: str) -> Metrics:
+    """The metrics of paragraphs typeset with `set_font(..., font)`, measured
+    by Typst once per font and preamble."""
+    text = set_font(METRICS_SOURCE, font)
+    shared_preamble = Config.get.typst_shared_preamble
+    additional_preamble = Config.get.typst_text_preamble
+    key = compiler.source_key(text, shared_preamble, additional_preamble, "", {})
+    if key in _metrics:
+        return _metrics[key]
+
+    path = cache_path("layout", key + ".json")
+    try:
+        with open(path) as f:
+            measured = json.load(f)
+    except (OSError, ValueError):
+        document = tc.get_typst_template().format(
+            shared_preamble=shared_preamble,
+            additional_preamble=additional_preamble,
+            vars="",
+            typst_expression=text,
+        )
+        measured = json.loads(compiler.query(document, f"<{METRICS_LABEL}>", "value"))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(measured, f)
+        os.replace(tmp_path, path)
+
+    _metrics[key] = Metrics(**measured)
+    return _metrics[key]
+
+
+def glyph_body(code: str) -> str:
+    # A page of its own as wide as the token, rather than a `set page` rule,
+    # so that it batches with other pages, see `compiler.compile_pages`
+    return f"#page(width: auto, margin: 0pt)[{code}]"
+
+
+def glyph_bodies(frames: List[List[TokenSource]]) -> List[str]:
+    """The Typst source of every distinct token in `frames`, to be compiled
+    after `font_preamble`."""
+    return list(
+        dict.fromkeys(glyph_body(code) for frame in frames for _, code, _ in frame)
+    )
+
+
+def svg_size(path: str) -> Tuple[float, float]:
+    """The page size of a Typst SVG, in pt."""
+    with open(path, "rb") as f:
+        match = SVG_SIZE_RE.search(f.read(1024))
+    assert match is not None, f"{path} is not an SVG compiled by Typst"
+    return float(match.group(1)), float(match.group(2))
+
+
+class Glyphs(TypstText):
+    """A token typeset on a page of its own, with the page's center at the
+    origin rather than the glyphs'."""
+
+    width: float
+    height: float
+
+    def get_items_from_file(self, file_path: str, mark_basepoint: bool = False):  # type: ignore[override]
+        self.width, self.height = svg_size(file_path)
+        return super().get_items_from_file(file_path, mark_basepoint)
+
+    def move_into_position(self) -> None:
+        pass
+
+
+_glyphs: Dict[Tuple[str, str, str, str, float], Glyphs] = {}
+
+
+def glyphs(font: str, code: str, scale: float) -> Glyphs:
+    key = (
+        font,
+        code,
+        Config.get.typst_shared_preamble,
+        Config.get.typst_text_preamble,
+        scale,
+    )
+    if key not in _glyphs:
+        _glyphs[key] = Glyphs(set_font(glyph_body(code), font), scale=scale)
+    return _glyphs[key]
+
+
+def pt_size(scale: float) -> float:
+    """The length of a Typst pt in frame units, as `TypstText` scales it."""
+    return Config.get.default_pixel_to_frame_ratio * FRAME_PPI / 72 * 24 / 11 * scale
+
+
+class ComposedText(Group[VItem]):
+    """A frame of tokens composed from their `Glyphs`, with the glyphs of each
+    token under its label like in the `TypstText` it stands in for."""
+
+    groups: Dict[str, List[VItem]]
+
+    def __init__(self, pieces: List[VItem], groups: Dict[str, List[VItem]], **kwargs):
+        super().__init__(*pieces, **kwargs)
+        self.groups = groups
+
+    def get_label(self, name: str) -> Group[VItem]:
+        return Group.from_iterable(self.groups[name])
+
+
+@cache
+def rgb(color: str) -> np.ndarray:
+    return Color(color).rgb
+
+
+def recolor(pieces: Iterable[VItem], color: str):
+    """Fill `pieces` with `color`, keeping their opacity."""
+    if color == WHITE:
+        return
+    for piece in pieces:
+        # A new array, as copies of an item share theirs
+        rgbas = piece.fill.get().copy()
+        rgbas[:, :3] = rgb(color)
+        piece.fill.set_rgbas(rgbas)
+
+
+def recolored(item: SVGItem, colors: Dict[str, str]) -> SVGItem:
+    """A copy of `item` typeset in white, with what is under each label in
+    `colors` filled with the label's color."""
+    copy = item.copy()
+    for label, color in colors.items():
+        recolor(copy.groups.get(label, []), color)
+    return copy
+
+
+def compose(font: str, tokens: List[TokenSource], scale: float) -> ComposedText:
+    """The glyphs of `tokens` where `TypstText` would place them, typesetting
+    `"".join(f"{text_box(code, color)}<{label}> " for label, code, color in tokens)`."""
+    measured = metrics(font)
+    pt = pt_size(scale)
+
+    pieces: List[VItem] = []
+    groups: Dict[str, List[VItem]] = {}
+    x = y = line_height = 0.0
+    for label, code, color in tokens:
+        template = glyphs(font, code, scale)
+        # First fit, breaking only at the spaces between tokens
+        if x > 0 and x + measured.space + template.width > measured.width:
+            x = 0.0
+            y += line_height + measured.leading
+            line_height = 0.0
+        elif x > 0:
+            x += measured.space
+
+        token = template.copy()
+        token.points.shift(
+            [(x + template.width / 2) * pt, -(y + template.height / 2) * pt, 0]
+        )
+        groups[label] = list(token.children)
+        recolor(groups[label], color)
+        pieces += token.children
+        x += template.width
+        line_height = max(line_height, template.height)
+
+    # The glyphs are the composed frame's children now
+    for piece in pieces:
+        piece.clear_parents()
+    return ComposedText(pieces, groups)
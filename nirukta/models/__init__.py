@@ -1,11 +1,12 @@
 from nirukta.models.enums import Language, Animation
-from nirukta.models.gloss import EnglishGloss, EtymGloss, Gloss
+from nirukta.models.gloss import EnglishGloss, EtymGloss, Gloss, GlossIndex
 from nirukta.models.tokens import (
     SimpleToken,
     CompoundToken,
     DisplayToken,
     TokenType,
-    frames_for_vakya,
+    Expansion,
+    FrameSequence,
     process_token,
     collect_leaf_slp1s,
     build_colorings,
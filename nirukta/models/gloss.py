@@ -1,8 +1,7 @@
 from dataclasses import dataclass
-from typing import Set, Union
+from typing import Dict, List, Union
 
 from nirukta.inflection import Case, SanskritInflection
-from nirukta.strings import find_nth
 
 
 @dataclass
@@ -15,30 +14,57 @@ class EnglishGloss:
 
     text: str
 
-    def find_reference(
-        self, english: str, visited: Set[tuple[int, int]]
-    ) -> tuple[int, int]:
-        n = 1
-        while True:
-            gi = find_nth(english, self.text, n)
-
-            assert gi >= 0, (
-                "Gloss cannot reference text not contained in the english translation!\n"
-                + f'Tried to find "{self.text}" in "{english}" but was unable.'
-            )
-
-            index = (gi, gi + len(self.text))
-
-            assert english[index[0] : index[1]] == self.text, (
-                "Invalid gloss index into english text"
-            )
-
-            # If we've already found this instance of the gloss text
-            if index in visited:
-                # Find the next one
-                n += 1
-            else:
-                return index
+    def find_reference(self, index: "GlossIndex") -> tuple[int, int]:
+        return index.next_reference(self.text)
+
+
+class GlossIndex:
+    """Where the glosses of an utterance refer to in its English.
+
+    Every gloss refers to the first occurrence of its text that no earlier
+    gloss with the same text took, so each text keeps a cursor past the last
+    occurrence taken, and the next one is searched for from there. The
+    references of a token are resolved once and reused by everything that
+    walks the utterance's tokens.
+    """
+
+    english: str
+    # Where to search for the next occurrence of each text
+    cursors: Dict[str, int]
+    # id(token) -> (token, its references), keeping the token alive
+    resolved: Dict[int, tuple[object, List[tuple[int, int]]]]
+
+    def __init__(self, english: str):
+        self.english = english
+        self.cursors = {}
+        self.resolved = {}
+
+    def next_reference(self, text: str) -> tuple[int, int]:
+        start = self.english.find(text, self.cursors.get(text, 0))
+
+        assert start >= 0, (
+            "Gloss cannot reference text not contained in the english translation!\n"
+            + f'Tried to find "{text}" in "{self.english}" but was unable.'
+        )
+
+        # Non-overlapping, like `str.count`
+        self.cursors[text] = start + (len(text) or 1)
+        return start, start + len(text)
+
+    def references(
+        self, token: object, glosses: List["Gloss"]
+    ) -> List[tuple[int, int]]:
+        """The references of the English glosses of `token`, resolved the first
+        time they are asked for."""
+        resolved = self.resolved.get(id(token))
+        if resolved is None:
+            spans = [
+                self.next_reference(gloss.text)
+                for gloss in glosses
+                if isinstance(gloss, EnglishGloss)
+            ]
+            resolved = self.resolved[id(token)] = (token, spans)
+        return resolved[1]
 
 
 type EtymGloss = Union[SanskritInflection, Case]
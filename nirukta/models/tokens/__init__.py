@@ -1,52 +1,33 @@
 from nirukta.models.tokens.simple import SimpleToken
 from nirukta.models.tokens.compound import CompoundToken
 from nirukta.models.tokens.display import DisplayToken
+from nirukta.models.tokens.frames import Expansion, FrameSequence
 
-from janim.imports import WHITE
+from nirukta.constants import WHITE
 from nirukta.strings import unswara
 from nirukta.inflection import SanskritInflection
-from nirukta.models.gloss import EnglishGloss
+from nirukta.models.gloss import EnglishGloss, GlossIndex
 
-from typing import Union, List, Set, Dict
+from typing import Union, List, Dict, Iterator
 
 type TokenType = Union[SimpleToken, CompoundToken, str]  # str for punctuation
 
 
-def frames_for_vakya(tokens: List[DisplayToken]) -> List[List[DisplayToken]]:
-    """
-    Generate animation frames by expanding one compound at a time, left to right.
-    Each frame is a flat list of DisplayTokens — the current visible surface.
-    """
-    current: List[DisplayToken] = list(tokens)
-    frames = [list(current)]
-
-    while True:
-        idx = next((i for i, t in enumerate(current) if not t.is_leaf), None)
-        if idx is None:
-            break
-        token = current[idx]
-        current = current[:idx] + token.children + current[idx + 1 :]
-        frames.append(list(current))
-
-    return frames
-
-
 def process_token(
-    english: str,
+    index: GlossIndex,
     token: Union[SimpleToken, CompoundToken, str],
-    visited: Set[tuple[int, int]],
 ):
     refs: List[tuple[str, List[tuple[int, int]]]] = []
 
     if isinstance(token, SimpleToken):
-        refs.append((token.slp1, token.gloss_refs(english, visited)))
+        refs.append((token.slp1, token.gloss_refs(index)))
         return refs
     elif isinstance(token, CompoundToken):
         # assume for now that there are no "etymological" glosses and that
         # compound tokens MUST be recursed in order to reveal full meanings
         for part in token.parts:
             # recurse on child tokens
-            refs += process_token(english, part, visited)
+            refs += process_token(index, part)
         return refs
     else:
         refs.append((token, []))
@@ -75,13 +56,15 @@ def build_colorings(tokens: List[TokenType], colors: List[str]) -> Dict[str, str
 
 
 def build_display_token(
-    english: str,
+    index: GlossIndex,
     token: TokenType,
-    visited: Set[tuple[int, int]],
     colorings: Dict[str, str],
+    ids: Iterator[int],
 ) -> DisplayToken:
+    """The display tree of `token`, numbered from `ids` children first, so the
+    same utterance always comes out with the same ids."""
     if isinstance(token, SimpleToken):
-        spans = token.gloss_refs(english, visited)
+        spans = token.gloss_refs(index)
         unswarad = unswara(token.slp1)
 
         leaf = DisplayToken(
@@ -89,6 +72,7 @@ def build_display_token(
             color=colorings.get(unswarad, WHITE),
             children=[],
             english_spans=spans,
+            id=next(ids),
         )
 
         if unswarad != token.slp1:
@@ -97,6 +81,7 @@ def build_display_token(
                 color=WHITE,
                 children=[leaf],
                 english_spans=[],
+                id=next(ids),
             )
         else:
             dt = leaf
@@ -106,6 +91,7 @@ def build_display_token(
             color=WHITE,
             children=[dt],
             english_spans=[],
+            id=next(ids),
         )
     elif isinstance(token, CompoundToken):
         sandhi_compound = (
@@ -118,7 +104,7 @@ def build_display_token(
         children = []
 
         if sandhi_compound:
-            children.append(build_display_token(english, "\\[", visited, colorings))
+            children.append(build_display_token(index, "\\[", colorings, ids))
 
         for i, part in enumerate(token.parts):
             etymological_token_part = False
@@ -132,21 +118,21 @@ def build_display_token(
                 etymological_token_part = len(etym_glosses) > 0
 
             if etymological_token_part:
-                children.append(build_display_token(english, "\\{", visited, colorings))
+                children.append(build_display_token(index, "\\{", colorings, ids))
 
-            children.append(build_display_token(english, part, visited, colorings))
+            children.append(build_display_token(index, part, colorings, ids))
 
             if etymological_token_part:
-                children.append(build_display_token(english, "\\}", visited, colorings))
+                children.append(build_display_token(index, "\\}", colorings, ids))
 
             if sandhi_compound:
                 if i < len(token.parts) - 1:
                     children.append(
-                        build_display_token(english, "+", visited, colorings)
+                        build_display_token(index, "+", colorings, ids)
                     )
                 else:
                     children.append(
-                        build_display_token(english, "\\]", visited, colorings)
+                        build_display_token(index, "\\]", colorings, ids)
                     )
 
         leaf = DisplayToken(
@@ -154,6 +140,7 @@ def build_display_token(
             color=WHITE,
             children=children,
             english_spans=[],  # spans live only on leaves
+            id=next(ids),
         )
         if unswarad != token.slp1:
             return DisplayToken(
@@ -161,6 +148,7 @@ def build_display_token(
                 color=WHITE,
                 children=[leaf],
                 english_spans=[],  # spans live only on leaves
+                id=next(ids),
             )
         else:
             return leaf
@@ -171,4 +159,5 @@ def build_display_token(
             color=WHITE,
             children=[],
             english_spans=[],
+            id=next(ids),
         )
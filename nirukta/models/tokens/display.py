@@ -1,9 +1,9 @@
-from typing import List
-import uuid
+import sys
 from dataclasses import dataclass, field
+from typing import List
 
 
-@dataclass
+@dataclass(slots=True)
 class DisplayToken:
     """A single renderable unit at a given animation stage."""
 
@@ -11,23 +11,40 @@ class DisplayToken:
     color: str  # resolved from colorings
     children: List["DisplayToken"]  # empty => leaf (SimpleToken or punct)
     english_spans: List[tuple[int, int]]  # the spans this token is responsible for
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # Numbered within the utterance, see `build_display_token`
+    id: int
     is_root: bool = field(default=False)
 
+    def __post_init__(self):
+        # The same few words and delimiters make up most of the tree
+        self.slp1 = sys.intern(self.slp1)
+
+    @property
+    def label(self) -> str:
+        """The Typst label of this token's text."""
+        return f"t{self.id}"
+
     @property
     def is_leaf(self) -> bool:
         return not self.children
 
     def at_depth(self, depth: int) -> List["DisplayToken"]:
-        if self.is_leaf or depth == 0:
-            return [self]
-        return [leaf for child in self.children for leaf in child.at_depth(depth - 1)]
-
-    def all_spans(self):
-        def __all_spans(dt: "DisplayToken", spans: List[tuple[int, int]]):
-            new_spans = spans + dt.english_spans
-            for child in dt.children:
-                new_spans.extend(__all_spans(child, []))
-            return new_spans
-
-        return sorted(__all_spans(self, []), key=lambda x: x[0])
+        tokens: List["DisplayToken"] = []
+        stack = [(self, depth)]
+        while stack:
+            token, depth = stack.pop()
+            if token.is_leaf or depth == 0:
+                tokens.append(token)
+            else:
+                stack.extend((child, depth - 1) for child in reversed(token.children))
+        return tokens
+
+    def all_spans(self) -> List[tuple[int, int]]:
+        spans: List[tuple[int, int]] = []
+        stack = [self]
+        while stack:
+            token = stack.pop()
+            spans += token.english_spans
+            stack.extend(reversed(token.children))
+        return sorted(spans, key=lambda x: x[0])
+
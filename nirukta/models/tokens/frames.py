@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from nirukta.models.enums import Animation
+from nirukta.models.tokens.display import DisplayToken
+from nirukta.strings import unswara
+
+
+@dataclass
+class Expansion:
+    """One animation step: the token at `index` is replaced by its children."""
+
+    index: int
+    token: DisplayToken
+
+    @property
+    def children(self) -> List[DisplayToken]:
+        return self.token.children
+
+    @property
+    def animation(self) -> Animation:
+        if len(self.children) > 1:
+            return Animation.EXPAND
+
+        assert len(self.children) == 1, "Only compounds are expanded"
+        child = self.children[0]
+        bare = unswara(self.token.slp1)
+        if bare != self.token.slp1 and bare == child.slp1:
+            return Animation.SWARAS
+        elif self.token.slp1 != child.slp1:
+            return Animation.SPELLS
+        elif self.token.color != child.color:
+            return Animation.COLORS
+        raise AssertionError("Unknown diff type")
+
+
+class FrameSequence:
+    """
+    Animation frames that expand one compound at a time, left to right, stored
+    as the first frame and what each step expanded.
+    """
+
+    tokens: List[DisplayToken]
+    steps: List[Expansion]
+
+    def __init__(self, tokens: List[DisplayToken]):
+        self.tokens = list(tokens)
+        self.steps = []
+
+        # The leftmost compound is always expanded first, so the steps are a
+        # pre-order walk of the token trees
+        stack = self.tokens[::-1]
+        index = 0
+        while stack:
+            token = stack.pop()
+            if token.is_leaf:
+                index += 1
+            else:
+                self.steps.append(Expansion(index, token))
+                stack.extend(reversed(token.children))
+
+    def __len__(self) -> int:
+        return len(self.steps) + 1
+
+    def __iter__(self) -> Iterator[List[DisplayToken]]:
+        """Each frame as a flat list of DisplayTokens, the current visible
+        surface. The same list is updated in place for the next frame, copy it
+        to keep it around."""
+        current = list(self.tokens)
+        yield current
+        for step in self.steps:
+            current[step.index : step.index + 1] = step.children
+            yield current
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
-from typing import List, Set
+from typing import List
 
-from nirukta.models.gloss import EnglishGloss, Gloss
+from nirukta.models.gloss import Gloss, GlossIndex
 
 
 @dataclass
@@ -11,14 +11,5 @@ class SimpleToken:
     slp1: str
     glosses: List[Gloss] = field(default_factory=list)
 
-    def gloss_refs(
-        self, english: str, visited: Set[tuple[int, int]]
-    ) -> List[tuple[int, int]]:
-        gloss_refs: List[tuple[int, int]] = []
-        for gloss in self.glosses:
-            if isinstance(gloss, EnglishGloss):
-                ref = gloss.find_reference(english, visited)
-                visited.add(ref)
-                gloss_refs.append(ref)
-
-        return gloss_refs
+    def gloss_refs(self, index: GlossIndex) -> List[tuple[int, int]]:
+        return index.references(self, self.glosses)
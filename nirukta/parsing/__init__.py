@@ -1,3 +1,18 @@
 from nirukta.models import SlokaFile, SutraFile
-from nirukta.parsing.visitors import SlokaVisitor, SutraVisitor
-from nirukta.parsing.grammars import SLOKA_GRAMMAR, SUTRA_GRAMMAR
+
+# The visitors need parsimonious and the grammars compiling, which tooling
+# that only needs the models or the descent parser shouldn't wait for
+LAZY = {
+    "SlokaVisitor": "nirukta.parsing.visitors",
+    "SutraVisitor": "nirukta.parsing.visitors",
+    "SLOKA_GRAMMAR": "nirukta.parsing.grammars",
+    "SUTRA_GRAMMAR": "nirukta.parsing.grammars",
+}
+
+
+def __getattr__(name: str):
+    if name not in LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(LAZY[name]), name)
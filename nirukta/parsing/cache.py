@@ -0,0 +1,63 @@
+import hashlib
+import os
+import pickle
+from typing import Optional, Union
+
+from nirukta.cache import cache_path, code_fingerprint
+from nirukta.models import SlokaFile, SutraFile
+
+type Parsed = Union[SlokaFile, SutraFile]
+
+# key -> (parsed file, content hash of every file it includes)
+_parsed: dict[str, tuple[Parsed, dict[str, str]]] = {}
+
+
+def content_hash(source: str) -> str:
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+
+def parse_key(kind: str, path: str, source: str) -> str:
+    md5 = hashlib.md5(code_fingerprint().encode())
+    for part in (kind, os.path.abspath(path), content_hash(source)):
+        md5.update(part.encode())
+        md5.update(b"\0")
+    return md5.hexdigest()
+
+
+def load(key: str) -> Optional[tuple[Parsed, dict[str, str]]]:
+    """The parsed file stored under `key`, as long as none of the files it
+    includes changed since."""
+    entry = _parsed.get(key)
+    if entry is None:
+        try:
+            with open(cache_path("parsed", key + ".pkl"), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    _, dependencies = entry
+    if any(file_hash(path) != hash for path, hash in dependencies.items()):
+        _parsed.pop(key, None)
+        return None
+
+    _parsed[key] = entry
+    return entry
+
+
+def store(key: str, parsed: Parsed, dependencies: dict[str, str]):
+    entry = (parsed, dependencies)
+    _parsed[key] = entry
+
+    path = cache_path("parsed", key + ".pkl")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(entry, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,306 @@
+"""Single pass recursive-descent parser for the .sloka/.sutra format.
+
+Builds the same models as the parsimonious grammars in `grammars.py` without
+an intermediate node tree. It mirrors their PEG semantics rule by rule, but
+only decides whether a file matches: on failure it returns None and the
+grammar is run instead, so errors are always reported by parsimonious.
+
+Enabled with `NIRUKTA_PARSER=descent`.
+"""
+
+import os
+from typing import List, Optional, Union
+
+try:
+    # The same engine parsimonious matches its regexes with
+    import regex as re
+except ImportError:
+    import re
+
+from nirukta.models import (
+    CompoundToken,
+    EnglishGloss,
+    Gloss,
+    Line,
+    SimpleToken,
+    Sloka,
+    SlokaFile,
+    TokenType,
+    Utterance,
+)
+from nirukta.parsing.gloss import parse_etym_gloss
+
+WS_RE = re.compile(r"\s*")
+CITATION_TEXT_RE = re.compile(r"[^=]+")
+TRANS_CONTENT_RE = re.compile(r"[^\]]+")
+ETYM_CONTENT_RE = re.compile(r"[^}]+")
+PUNCT_RE = re.compile(r"\.+(?:\s*\d+\s*[.,;]*)?|[;,]")
+SLP1_RE = re.compile(r"[^[\]{}.;=+()\"\s]+")
+QUOTED_STR_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+FILE_RE = re.compile(r"file:([a-zA-Z0-9._]+(?:/[a-zA-Z0-9._]+)+)")
+
+LINE_MARK = "--- line ---"
+SLOKA_MARK = "=== sloka ==="
+
+
+def use_descent_parser() -> bool:
+    return os.environ.get("NIRUKTA_PARSER") == "descent"
+
+
+class NoMatch(Exception):
+    pass
+
+
+class DescentParser:
+    text: str
+    pos: int
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def sloka_file(self) -> Optional[SlokaFile]:
+        try:
+            self.ws()
+            citation = self.citation_line()
+            self.ws()
+            lines = self.lines()
+            self.ws()
+            self.end()
+        except NoMatch:
+            return None
+        return SlokaFile(citation=citation, sloka=Sloka(lines))
+
+    def sutra(self) -> Optional[tuple[str, List[Union[Sloka, str]]]]:
+        """The citation and slokas of a sutra, with external slokas left as the
+        paths they were included by."""
+        try:
+            citation = self.citation_line()
+            self.ws()
+            slokas: List[Union[Sloka, str]] = []
+            while self.pos < len(self.text):
+                start = self.pos
+                try:
+                    slokas.append(self.inline_sloka())
+                    continue
+                except NoMatch:
+                    self.pos = start
+                try:
+                    slokas.append(self.external_sloka())
+                except NoMatch:
+                    self.pos = start
+                    break
+            if not slokas:
+                raise NoMatch
+            self.ws()
+            self.end()
+        except NoMatch:
+            return None
+        return citation, slokas
+
+    def sutra_block(self) -> Optional[Union[Sloka, str]]:
+        """A single `=== sloka ===` block of a sutra, see `sutra`."""
+        try:
+            try:
+                sloka: Union[Sloka, str] = self.inline_sloka()
+            except NoMatch:
+                self.pos = 0
+                sloka = self.external_sloka()
+            self.end()
+        except NoMatch:
+            return None
+        return sloka
+
+    # -- terminals ----------------------------------------------------------
+
+    def end(self):
+        if self.pos != len(self.text):
+            raise NoMatch
+
+    def ws(self):
+        self.pos = WS_RE.match(self.text, self.pos).end()  # type: ignore[union-attr]
+
+    def literal(self, literal: str):
+        if not self.text.startswith(literal, self.pos):
+            raise NoMatch
+        self.pos += len(literal)
+
+    def regex(self, pattern: re.Pattern) -> re.Match:
+        match = pattern.match(self.text, self.pos)
+        if match is None:
+            raise NoMatch
+        self.pos = match.end()
+        return match
+
+    def peek(self, char: str) -> bool:
+        return self.text.startswith(char, self.pos)
+
+    # -- sutra --------------------------------------------------------------
+
+    def inline_sloka(self) -> Sloka:
+        self.ws()
+        self.literal(SLOKA_MARK)
+        self.ws()
+        lines = self.lines()
+        self.ws()
+        return Sloka(lines)
+
+    def external_sloka(self) -> str:
+        self.ws()
+        self.literal(SLOKA_MARK)
+        self.ws()
+        file = self.regex(FILE_RE).group(1)
+        self.ws()
+        return file
+
+    # -- sloka --------------------------------------------------------------
+
+    def citation_line(self) -> str:
+        self.literal("===")
+        self.ws()
+        text = self.regex(CITATION_TEXT_RE).group()
+        self.ws()
+        self.literal("===")
+        return text.strip()
+
+    def lines(self) -> List[Line]:
+        lines = [self.line()]
+        while self.pos < len(self.text):
+            start = self.pos
+            try:
+                lines.append(self.line())
+            except NoMatch:
+                self.pos = start
+                break
+        return lines
+
+    def line(self) -> Line:
+        self.literal(LINE_MARK)
+        self.ws()
+        vAkyAni = [self.verse_line()]
+        while self.pos < len(self.text):
+            start = self.pos
+            try:
+                vAkyAni.append(self.verse_line())
+            except NoMatch:
+                self.pos = start
+                break
+        return Line(vAkyAni=vAkyAni)
+
+    def verse_line(self) -> Utterance:
+        if self.peek(LINE_MARK):
+            raise NoMatch
+
+        tokens = self.token_seq()
+        self.ws()
+        english = [self.quoted_str()]
+        while self.pos < len(self.text):
+            start = self.pos
+            self.ws()
+            try:
+                english.append(self.quoted_str())
+            except NoMatch:
+                self.pos = start
+                break
+        self.ws()
+        return Utterance(tokens=tokens, english="#linebreak()".join(english))
+
+    def quoted_str(self) -> str:
+        content = self.regex(QUOTED_STR_RE).group(1)
+        return content.replace('\\"', '"').replace("\\\\", "\\")
+
+    # -- tokens -------------------------------------------------------------
+
+    def token_seq(self) -> List[TokenType]:
+        tokens = [self.token()]
+        while self.pos < len(self.text):
+            start = self.pos
+            self.ws()
+            try:
+                tokens.append(self.token())
+            except NoMatch:
+                self.pos = start
+                break
+        return tokens
+
+    def token(self) -> TokenType:
+        start = self.pos
+        try:
+            first = self.comp_part()
+        except NoMatch:
+            self.pos = start
+            return self.regex(PUNCT_RE).group()
+
+        # Parse the first part once, rather than again as a simple token when
+        # it turns out not to start a compound
+        after_first = self.pos
+        try:
+            return self.compound_token(first)
+        except NoMatch:
+            if not isinstance(first, SimpleToken):
+                raise
+            self.pos = after_first
+            return first
+
+    def compound_token(
+        self, first: Optional[Union[SimpleToken, CompoundToken]] = None
+    ) -> CompoundToken:
+        parts = [first or self.comp_part()]
+        while self.peek("+"):
+            start = self.pos
+            self.pos += 1
+            try:
+                parts.append(self.comp_part())
+            except NoMatch:
+                self.pos = start
+                break
+
+        self.literal("=")
+        surface = self.regex(SLP1_RE).group()
+
+        etym_gloss = None
+        if self.peek("{"):
+            start = self.pos
+            try:
+                etym_gloss = self.etym_gloss()
+            except NoMatch:
+                self.pos = start
+
+        return CompoundToken(parts=parts, slp1=surface, etym_gloss=etym_gloss)
+
+    def comp_part(self) -> Union[SimpleToken, CompoundToken]:
+        if self.peek("("):
+            self.pos += 1
+            compound = self.compound_token()
+            self.literal(")")
+            return compound
+        return self.simple_token()
+
+    def simple_token(self) -> SimpleToken:
+        slp1 = self.regex(SLP1_RE).group()
+        glosses: List[Gloss] = []
+        while self.pos < len(self.text):
+            start = self.pos
+            try:
+                if self.peek("["):
+                    glosses.append(self.trans_gloss())
+                elif self.peek("{"):
+                    glosses.append(self.etym_gloss())  # type: ignore[arg-type]
+                else:
+                    break
+            except NoMatch:
+                self.pos = start
+                break
+        return SimpleToken(slp1=slp1, glosses=glosses)
+
+    def trans_gloss(self) -> EnglishGloss:
+        self.literal("[")
+        content = self.regex(TRANS_CONTENT_RE).group()
+        self.literal("]")
+        return EnglishGloss(text=content)
+
+    def etym_gloss(self):
+        self.literal("{")
+        content = self.regex(ETYM_CONTENT_RE).group()
+        self.literal("}")
+        return parse_etym_gloss(content)
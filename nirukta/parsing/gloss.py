@@ -0,0 +1,23 @@
+import logging
+import traceback
+from typing import Optional
+
+from nirukta.inflection import Case, SanskritInflection
+from nirukta.models import EtymGloss
+
+
+def parse_etym_gloss(content: str) -> Optional[EtymGloss]:
+    """The inflection or case named by the contents of a `{}` gloss."""
+    try:
+        inflection = SanskritInflection.parse(content)
+        print(f"inflection: {inflection}")
+        return inflection
+    except Exception:
+        try:
+            case = Case.parse(content)
+            print(f"case: {case}")
+            return case
+        except Exception:
+            print(f'Error! invalid etymological glossing: "{content}"\n')
+            logging.error(traceback.format_exc())
+            return None
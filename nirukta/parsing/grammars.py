@@ -1,4 +1,7 @@
-from parsimonious.grammar import Grammar
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from parsimonious.grammar import Grammar
 
 SLOKA_GRAMMAR_STR = r"""
     sloka           = ws citation_line ws line+ ws
@@ -52,5 +55,29 @@ SUTRA_GRAMMAR_STR = (
     + SLOKA_GRAMMAR_STR
 )
 
-SLOKA_GRAMMAR = Grammar(SLOKA_GRAMMAR_STR)
-SUTRA_GRAMMAR = Grammar(SUTRA_GRAMMAR_STR)
+def _grammar(rules: str) -> "Grammar":
+    # parsimonious builds its own grammar when it is first imported
+    from parsimonious.grammar import Grammar
+
+    return Grammar(rules)
+
+
+# Compiled on first use, see `__getattr__`
+GRAMMARS: dict[str, Callable[[], "Grammar"]] = {
+    "SLOKA_GRAMMAR": lambda: _grammar(SLOKA_GRAMMAR_STR),
+    "SUTRA_GRAMMAR": lambda: _grammar(SUTRA_GRAMMAR_STR),
+    # The parts of a sutra, for parsing it one `=== sloka ===` block at a time
+    "CITATION_GRAMMAR": lambda: __getattr__("SUTRA_GRAMMAR").default("citation_line"),
+    "INLINE_SLOKA_GRAMMAR": lambda: __getattr__("SUTRA_GRAMMAR").default("inline_sloka"),
+    "EXTERNAL_SLOKA_GRAMMAR": lambda: __getattr__("SUTRA_GRAMMAR").default(
+        "external_sloka"
+    ),
+}
+
+
+def __getattr__(name: str) -> "Grammar":
+    if name not in GRAMMARS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Module attributes take precedence over `__getattr__` from now on
+    grammar = globals()[name] = GRAMMARS[name]()
+    return grammar
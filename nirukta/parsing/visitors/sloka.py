@@ -1,8 +1,5 @@
-import logging
 import os
-import traceback
 from typing import Optional
-from nirukta.inflection import Case, SanskritInflection
 from nirukta.models import (
     CompoundToken,
     EnglishGloss,
@@ -12,8 +9,12 @@ from nirukta.models import (
     Sloka,
     Utterance,
 )
+from nirukta import profiling
 from nirukta.models import SlokaFile
-from nirukta.parsing.grammars import SLOKA_GRAMMAR
+from nirukta.parsing import cache
+from nirukta.parsing.descent import DescentParser, use_descent_parser
+from nirukta.parsing.gloss import parse_etym_gloss
+from nirukta.parsing import grammars
 from parsimonious.nodes import NodeVisitor
 
 
@@ -21,20 +22,44 @@ class SlokaVisitor(NodeVisitor):
     file: str
     dir: str
     source: str
+    # Content hash of every file included while parsing this one
+    dependencies: dict[str, str]
 
-    def __init__(self, file: str):
+    def __init__(self, file: str, source: Optional[str] = None):
         NodeVisitor.__init__(self)
 
-        print(f"Loading {file}...")
+        if source is None:
+            print(f"Loading {file}...")
+            with open(file) as f:
+                source = f.read()
 
-        with open(file) as f:
-            self.source = f.read()
+        self.source = source
 
         self.file = file
         self.directory = os.path.dirname(self.file)
+        self.dependencies = {}
 
     def parse(self) -> SlokaFile:
-        tree = SLOKA_GRAMMAR.parse(self.source)
+        """Parse the file, or reuse the result of parsing the same contents
+        before, in this process or a previous one."""
+        with profiling.span("parse", "parse", file=self.file):
+            key = cache.parse_key(type(self).__name__, self.file, self.source)
+            if entry := cache.load(key):
+                parsed, self.dependencies = entry
+                return parsed  # type: ignore[return-value]
+
+            parsed = self.parse_source()
+            cache.store(key, parsed, self.dependencies)
+            return parsed
+
+    def parse_source(self) -> SlokaFile:
+        if use_descent_parser():
+            parsed = DescentParser(self.source).sloka_file()
+            if parsed is not None:
+                return parsed
+            # Fall through so that the grammar reports the error
+
+        tree = grammars.SLOKA_GRAMMAR.parse(self.source)
         return self.visit(tree)
 
 
@@ -111,7 +136,7 @@ class SlokaVisitor(NodeVisitor):
 
     def visit_simple_token(self, _, visited_children):
         slp1, glosses = visited_children
-        return SimpleToken(slp1=slp1, glosses=glosses)
+        return SimpleToken(slp1=slp1, glosses=list(glosses))
 
     def visit_gloss(self, _, visited_children):
         return visited_children[0]
@@ -122,19 +147,7 @@ class SlokaVisitor(NodeVisitor):
 
     def visit_etym_gloss(self, _, visited_children):
         _, content, _ = visited_children
-        try:
-            inflection = SanskritInflection.parse(content)
-            print(f"inflection: {inflection}")
-            return inflection
-        except Exception:
-            try:
-                case = Case.parse(content)
-                print(f"case: {case}")
-                return case
-            except Exception:
-                print(f'Error! invalid etymological glossing: "{content}"\n')
-                logging.error(traceback.format_exc())
-                return None
+        return parse_etym_gloss(content)
 
     def visit_trans_content(self, node, _):
         return node.text
@@ -1,29 +1,156 @@
 import os
-from typing import List
+import re
+from collections import deque
+from typing import Iterator, List, Optional, Tuple, Union
 from nirukta.models import Sloka, SutraFile
-from nirukta.parsing.grammars import SUTRA_GRAMMAR
+from nirukta import profiling
+from nirukta.parsing import cache
+from nirukta.parsing.descent import DescentParser, use_descent_parser
+from nirukta.parsing import grammars
 from nirukta.parsing.visitors.sloka import SlokaVisitor
+from nirukta.pool import process_pool, worker_count
+from parsimonious.exceptions import ParseError
+
+SLOKA_MARK_RE = re.compile(r"^[ \t]*=== sloka ===", re.MULTILINE)
+
+# Sutras larger than this have their blocks parsed across the worker pool,
+# below it starting the workers costs more than it saves
+PARALLEL_PARSE_SIZE = 512 * 1024
+
+
+def parse_block(file: str, block: str) -> Optional[Union[Sloka, str]]:
+    """A single `=== sloka ===` block of a sutra: either the sloka or the path
+    it is included from. None if the block doesn't parse."""
+    if use_descent_parser():
+        return DescentParser(block).sutra_block()
+
+    visitor = SutraVisitor(file, block)
+    for grammar in (grammars.INLINE_SLOKA_GRAMMAR, grammars.EXTERNAL_SLOKA_GRAMMAR):
+        try:
+            return visitor.visit(grammar.parse(block))
+        except ParseError:
+            pass
+    return None
 
 
 class SutraVisitor(SlokaVisitor):
     def parse(self) -> SutraFile:
-        tree = SUTRA_GRAMMAR.parse(self.source)
+        return super().parse()  # type: ignore[return-value]
+
+    def parse_source(self) -> SutraFile:
+        citation = self.citation()
+        if citation is None:
+            return self.parse_whole()
+        return SutraFile(citation, list(self.iter_slokas()))
+
+    def parse_slokas(self) -> Tuple[str, Iterator[Sloka]]:
+        """The citation, and the slokas as they are parsed, for whatever reads
+        them to start on the first while the rest are still being parsed. Like
+        `parse`, reuses the result of parsing the same contents before, and
+        stores it once every sloka has been read."""
+        key = cache.parse_key(type(self).__name__, self.file, self.source)
+        if entry := cache.load(key):
+            parsed, self.dependencies = entry
+            return parsed.citation, iter(parsed.slokas)  # type: ignore[union-attr]
+
+        citation = self.citation()
+        if citation is None:
+            # Have the whole file parsed, or the error reported
+            parsed = self.parse()
+            return parsed.citation, iter(parsed.slokas)
+
+        def slokas() -> Iterator[Sloka]:
+            read: List[Sloka] = []
+            with profiling.span("parse", "parse", file=self.file):
+                for sloka in self.iter_slokas():
+                    read.append(sloka)
+                    yield sloka
+            cache.store(key, SutraFile(citation, read), self.dependencies)
+
+        return citation, slokas()
+
+    def parse_whole(self) -> SutraFile:
+        if use_descent_parser():
+            parsed = DescentParser(self.source).sutra()
+            if parsed is not None:
+                return self.resolve(*parsed)
+            # Fall through so that the grammar reports the error
+
+        tree = grammars.SUTRA_GRAMMAR.parse(self.source)
         return self.visit(tree)
 
+    def citation(self) -> Optional[str]:
+        """The citation heading the sutra, None if it doesn't parse."""
+        match = SLOKA_MARK_RE.search(self.source)
+        header = self.source[: match.start() if match else 0].rstrip()
+        try:
+            return self.visit(grammars.CITATION_GRAMMAR.parse(header))
+        except ParseError:
+            return None
+
+    def blocks(self) -> Iterator[str]:
+        starts = [match.start() for match in SLOKA_MARK_RE.finditer(self.source)]
+        for start, end in zip(starts, starts[1:] + [len(self.source)]):
+            yield self.source[start:end]
+
+    def parsed_blocks(self) -> Iterator[Optional[Union[Sloka, str]]]:
+        workers = worker_count()
+        if len(self.source) < PARALLEL_PARSE_SIZE or workers <= 1:
+            for block in self.blocks():
+                yield parse_block(self.file, block)
+            return
+
+        # Keep only a few blocks in flight ahead of the consumer
+        with process_pool(workers) as pool:
+            pending = deque()
+            for block in self.blocks():
+                pending.append(pool.submit(parse_block, self.file, block))
+                if len(pending) > 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_slokas(self) -> Iterator[Sloka]:
+        """Parse the sutra one `=== sloka ===` block at a time, yielding each
+        sloka as soon as it is ready. Only one block's parse tree is held at a
+        time, rather than the whole file's."""
+        read: List[Sloka] = []
+        for sloka in self.parsed_blocks():
+            if sloka is None:
+                # Have the grammar report the error in terms of the whole file,
+                # or pick up after what was read should the blocks have been
+                # misjudged, in which case block N needn't be sloka N
+                whole = self.parse_whole().slokas
+                done = 0
+                while done < min(len(read), len(whole)) and whole[done] == read[done]:
+                    done += 1
+                yield from whole[done:]
+                return
+            read.append(self.include(sloka))
+            yield read[-1]
+
     def visit_sutra(self, _, visited_children):
         citation, _, raw_slokas, _ = visited_children
+        return self.resolve(
+            citation,
+            [sloka[0] if isinstance(sloka, list) else sloka for sloka in raw_slokas],
+        )
+
+    def resolve(self, citation: str, raw_slokas: List[Union[Sloka, str]]) -> SutraFile:
+        return SutraFile(citation, [self.include(sloka) for sloka in raw_slokas])
+
+    def include(self, sloka: Union[Sloka, str]) -> Sloka:
+        """The sloka itself, or the sloka of the file it is included from."""
+        if isinstance(sloka, Sloka):
+            return sloka
 
-        processed_slokas: List[Sloka]= []
-        for sloka in raw_slokas:
-            if isinstance(sloka, list):
-                sloka = sloka[0]
-            if isinstance(sloka, Sloka):
-                processed_slokas.append(sloka)
-            else:
-                sloka_file = os.path.normpath(os.path.join(self.directory, sloka))
-                processed_slokas.append(SlokaVisitor(sloka_file).parse().sloka)
-
-        return SutraFile(citation, processed_slokas)
+        sloka_file = os.path.normpath(os.path.join(self.directory, sloka))
+        visitor = SlokaVisitor(sloka_file)
+        included = visitor.parse().sloka
+        dependency = os.path.abspath(sloka_file)
+        self.dependencies[dependency] = cache.content_hash(visitor.source)
+        self.dependencies.update(visitor.dependencies)
+        return included
 
     def visit_inline_sloka(self, _, visited_children):
         _, _, _, lines, _ = visited_children
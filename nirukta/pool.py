@@ -0,0 +1,19 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+def worker_count() -> int:
+    return int(os.environ.get("NIRUKTA_WORKERS", os.cpu_count() or 1))
+
+
+def process_pool(
+    workers: int, initializer: Optional[Callable[[], None]] = None
+) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        workers,
+        # Forking a process that runs the janim GUI isn't safe
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
@@ -1,27 +1,143 @@
-import cProfile
-import pstats
+"""Stage profiler, enabled with `NIRUKTA_PROFILE`.
+
+Times parsing, display token building, transliteration, Typst compilation,
+SVG conversion, timeline building and rendering, and writes them out as a
+Chrome trace when the process exits, to be opened in ui.perfetto.dev or
+chrome://tracing. `NIRUKTA_PROFILE=1` writes nirukta-trace.json, any other
+value is the path to write to.
+
+    NIRUKTA_PROFILE=1 python -m nirukta.batch library/test.sloka --build-only
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import multiprocessing
+import os
+import threading
 import time
+from typing import Any, Callable, Iterator, List, Optional
+
+DEFAULT_TRACE_PATH = "nirukta-trace.json"
+
+_events: List[dict] = []
+_writing = False
+
+
+def trace_path() -> Optional[str]:
+    value = os.environ.get("NIRUKTA_PROFILE", "")
+    if value in ("", "0"):
+        return None
+    return DEFAULT_TRACE_PATH if value == "1" else value
+
+
+ENABLED = trace_path() is not None
+
+
+@contextlib.contextmanager
+def span(name: str, category: str, /, **args: Any) -> Iterator[None]:
+    """Record the time spent in the block as a stage of `category`."""
+    if not ENABLED:
+        yield
+        return
+
+    # Wall clock time lines up the spans of worker processes
+    start = time.time_ns()
+    try:
+        yield
+    finally:
+        _events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (time.time_ns() - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": args,
+            }
+        )
+
+
+def traced(category: str, name: Optional[str] = None):
+    """Record every call of the decorated function, see `span`."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__name__, category):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def drain() -> List[dict]:
+    """Hand over what this process recorded, for a worker to return to the
+    process that writes the trace."""
+    events = list(_events)
+    _events.clear()
+    return events
+
+
+def merge(events: List[dict]):
+    _events.extend(events)
+
+
+def write(path: str):
+    with open(path, "w") as f:
+        json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f)
+    print(f"Wrote {len(_events)} profiled spans to {path}")
+
+
+def install():
+    """Time the stages janim runs, and write the trace on exit."""
+    if not ENABLED:
+        return
+
+    from janim.anims.timeline import Timeline
+    from janim.items.svg.svg_item import SVGItem
+    from janim.render.writer import VideoWriter
+
+    if getattr(Timeline, "_build_profiled", False):
+        return
+
+    build = Timeline.build
+
+    @functools.wraps(build)
+    def profiled_build(self, *args, **kwargs):
+        name = getattr(self, "gui_name", None)
+        with span(type(self).__name__, "timeline", name=name):
+            return build(self, *args, **kwargs)
+
+    get_items_from_file = SVGItem.get_items_from_file.__func__  # type: ignore[attr-defined]
+
+    @functools.wraps(get_items_from_file)
+    def profiled_get_items_from_file(cls, file_path, *args, **kwargs):
+        with span("svg", "svg", file=os.path.basename(file_path)):
+            return get_items_from_file(cls, file_path, *args, **kwargs)
 
-with open("./library/sUtrARi/SrIsarasvatIstotraM.sutra") as f:
-    source = f.read()
+    write_all = VideoWriter.write_all
 
-# --- parsing / logic stage ---
-t0 = time.perf_counter()
-from parser import parse_sutra  # noqa: E402
+    @functools.wraps(write_all)
+    def profiled_write_all(self, file_path, *args, **kwargs):
+        with span("render", "render", file=file_path):
+            return write_all(self, file_path, *args, **kwargs)
 
-sutra = parse_sutra(source)
-t1 = time.perf_counter()
-print(f"parse: {t1 - t0:.2f}s")
+    Timeline.build = profiled_build  # type: ignore[method-assign]
+    SVGItem.get_items_from_file = classmethod(profiled_get_items_from_file)  # type: ignore[method-assign]
+    VideoWriter.write_all = profiled_write_all  # type: ignore[method-assign]
+    Timeline._build_profiled = True  # type: ignore[attr-defined]
 
-# --- janim build stage ---
-from nirukta import Nirukta  # noqa: E402
+    write_on_exit()
 
-with cProfile.Profile() as pr:
-    tl = Nirukta(sutra)
-    built = tl.build()
-t2 = time.perf_counter()
-print(f"build: {t2 - t1:.2f}s")
 
-stats = pstats.Stats(pr)
-stats.sort_stats(pstats.SortKey.CUMULATIVE)
-stats.print_stats(30)
+def write_on_exit():
+    global _writing
+    # Workers hand their spans back rather than writing their own trace
+    if ENABLED and not _writing and multiprocessing.parent_process() is None:
+        atexit.register(write, trace_path())
+        _writing = True
@@ -25,9 +25,10 @@ from janim.imports import (
 from nirukta.constants import INTRO_FONT, LATIN_FONT, SCALE, TYPST_CMD_RE
 from nirukta.models import Language, Sloka
 from janim.imports import WHITE, C_LABEL_ANIM_ABSTRACT
-from aksharamukha import transliterate
+from nirukta.transliteration import transliterate
 
 from dataclasses import dataclass, field
+from typing import Dict, List
 from nirukta.models import Animation
 
 
@@ -72,6 +73,8 @@ class Diff:
     anim: Animation
     token_id: str
     initial: bool = field(default=False)
+    # The token replaced between the frames -> the tokens that replaced it
+    lineage: Dict[str, List[str]] = field(default_factory=dict)
 
     def name(self):
         return str(self.anim.value)
@@ -114,55 +117,66 @@ class Diff:
             )
 
 
-def sloka_group(sloka: Sloka) -> Group[TypstText]:
-    group = []
+def citation_code(citation: str) -> str:
+    return typst_code(citation, Language.SANSKRIT)
+
+
+def sloka_group_sources(sloka: Sloka) -> List[str]:
+    """Typst source of every line of `sloka_group`, to be set in INTRO_FONT."""
+    sources = []
 
     for li, line in enumerate(sloka.lines):
-        sanskrit = ""
         sanskritcode = ""
         for vi, vAkya in enumerate(line.vAkyAni):
             utterancetext = ""
             for token in vAkya.tokens:
                 if isinstance(token, str):
-                    sanskrit += token
                     utterancetext += token
                 else:
-                    sanskrit += token.slp1
                     utterancetext += token.slp1
 
-                sanskrit += " "
                 utterancetext += " "
             utterance_code = f"{typst_code(utterancetext, Language.SANSKRIT)}<line_{li}_utterance_{vi}>"
             sanskritcode += utterance_code
 
-        group.append(
-            TypstText(
-                # set_font(typst_code(sanskrit, Language.SANSKRIT), INTRO_FONT),
-                set_font(sanskritcode, INTRO_FONT),
-                scale=SCALE,
-            )
-        )
+        sources.append(sanskritcode)
 
-    group = Group(*group)
+    return sources
+
+
+def sloka_group(sloka: Sloka) -> Group[TypstText]:
+    group = Group(
+        *(
+            TypstText(set_font(source, INTRO_FONT), scale=SCALE)
+            for source in sloka_group_sources(sloka)
+        )
+    )
     group.points.arrange(DOWN)
     return group
 
-def sloka_group_english(sloka: Sloka) -> Group[TypstText]:
-    group = []
+
+def sloka_group_english_sources(sloka: Sloka) -> List[str]:
+    """Typst source of every line of `sloka_group_english`, to be set in
+    LATIN_FONT."""
+    sources = []
 
     for li, line in enumerate(sloka.lines):
         english = ""
         for vi, vAkya in enumerate(line.vAkyAni):
             english += vAkya.english + "#linebreak()"
 
-        group.append(
-            TypstText(
-                set_font(typst_code(english, Language.ENGLISH), LATIN_FONT),
-                scale=SCALE,
-            )
-        )
+        sources.append(typst_code(english, Language.ENGLISH))
+
+    return sources
+
 
-    group = Group(*group)
+def sloka_group_english(sloka: Sloka) -> Group[TypstText]:
+    group = Group(
+        *(
+            TypstText(set_font(source, LATIN_FONT), scale=SCALE)
+            for source in sloka_group_english_sources(sloka)
+        )
+    )
     group.points.arrange(DOWN)
     return group
 
@@ -173,6 +187,8 @@ def Junicode_translit(iast: str, color: str) -> str:
         return text_box(iast, color)
 
     def T(s):
+        if color == "#FFFFFF":
+            return f"#text[{s}]"
         return f'#text(fill: rgb("{color}"))[{s}]'
 
     parts = iast.split("ṃ")
@@ -190,8 +206,12 @@ def Junicode_translit(iast: str, color: str) -> str:
     return f"#box[{inner}]"
 
 
+def font_preamble(font: str) -> str:
+    return f'#set text(font: "{font}", stroke: none)\n#set page(width: {266 * SCALE}pt)\n'
+
+
 def set_font(text: str, font: str):
-    return f'#set text(font: "{font}", stroke: none)\n#set page(width: {266 * SCALE}pt)\n{text}'
+    return f"{font_preamble(font)}{text}"
 
 
 def text_box(text: str, color: str, stroke_mode: bool = False):
@@ -225,12 +245,12 @@ def transform_text(text: str, language: Language):
         case Language.ENGLISH:
             return text
         case Language.TRANSLIT:
-            iast = transliterate.process("SLP1", "IAST", text)
+            iast = transliterate(text, language)
             if not iast:
                 raise ValueError(f'Cannot represent "{text}" in IAST')
             return iast
         case Language.SANSKRIT:
-            deva = transliterate.process("SLP1", "DEVANAGARI", text)
+            deva = transliterate(text, language)
             if not deva:
                 raise ValueError(f'Cannot represent "{text}" in devanagari')
             return deva
@@ -0,0 +1,156 @@
+"""Table-driven SLP1 -> IAST/Devanagari transliteration.
+
+Reproduces aksharamukha's output for the subset of SLP1 nirukta files use,
+including the `\\'` (udātta) and `\\_` (anudātta) accent marks that `unswara`
+strips. `supports` tells whether a string stays within that subset.
+"""
+
+import re
+from typing import List, Optional
+
+VOWELS = "aAiIuUfFxXeEoO"
+CONSONANTS = "kKgGNcCjJYwWqQRtTdDnpPbBmyrlvSzshL"
+YOGAVAHAS = "MH~"
+LETTERS = set(VOWELS + CONSONANTS + YOGAVAHAS)
+YOGAVAHA_SET = set(YOGAVAHAS)
+ACCENTS = {"\\'": ("\u030d", "\u0951"), "\\_": ("\u0331", "\u0952")}
+
+IAST = dict(
+    zip(
+        VOWELS + CONSONANTS + YOGAVAHAS,
+        [
+            *["a", "ā", "i", "ī", "u", "ū", "ṛ", "ṝ", "ḷ", "ḹ", "e", "ai", "o", "au"],
+            *["k", "kh", "g", "gh", "ṅ", "c", "ch", "j", "jh", "ñ"],
+            *["ṭ", "ṭh", "ḍ", "ḍh", "ṇ", "t", "th", "d", "dh", "n"],
+            *["p", "ph", "b", "bh", "m", "y", "r", "l", "v", "ś", "ṣ", "s", "h"],
+            *["l\u0324", "ṃ", "ḥ", "m\u0310"],
+        ],
+    )
+)
+
+DEVANAGARI_VOWELS = dict(zip(VOWELS, "अआइईउऊऋॠऌॡएऐओऔ"))
+DEVANAGARI_MATRAS = dict(zip(VOWELS, ["", *"ािीुूृॄॢॣेैोौ"]))
+DEVANAGARI_CONSONANTS = dict(zip(CONSONANTS, "कखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसहळ"))
+DEVANAGARI_OTHER = {
+    **dict(zip(YOGAVAHAS, "ंःँ")),
+    **dict(zip("0123456789", "०१२३४५६७८९")),
+    "'": "ऽ",
+}
+VIRAMA = "्"
+
+# Characters outside SLP1 that aksharamukha passes through untouched
+PASSTHROUGH = set(" \t,;:-+!?()[]{}#\"")
+# Characters a backslash may escape for Typst
+ESCAPED = set("[]{}")
+SUPPORTED = LETTERS | set("0123456789.'\\_") | PASSTHROUGH
+
+UNIT_RE = re.compile(r"\\['_]|\.+|.", re.DOTALL)
+
+
+def _units(text: str) -> List[str]:
+    return UNIT_RE.findall(text)
+
+
+def supports(text: str) -> bool:
+    """Whether `text` is handled natively, rather than needing aksharamukha.
+
+    Accents are only handled where they follow a vowel, optionally separated by
+    anusvāra/visarga/candrabindu, which is how nirukta files use them.
+    """
+    if not set(text) <= SUPPORTED:
+        return False
+
+    units = _units(text)
+    previous: Optional[str] = None
+    for i, unit in enumerate(units):
+        following = units[i + 1] if i + 1 < len(units) else None
+        if unit in ACCENTS:
+            if previous in YOGAVAHA_SET and i > 1:
+                previous = units[i - 2]
+            if previous not in DEVANAGARI_VOWELS:
+                return False
+            # An accent followed by an avagraha is read as a double svarita
+            if following == "'":
+                return False
+            # ...and aksharamukha only moves it across a single yogavāha
+            if following in YOGAVAHA_SET and "".join(units[i + 2 : i + 3]) in YOGAVAHA_SET:
+                return False
+        # A bare "_" is swallowed after consonants
+        elif unit == "_":
+            return False
+        # Backslashes only escape Typst brackets, otherwise they mark accents
+        elif unit == "\\" and following not in ESCAPED:
+            return False
+        # Digits after a letter mark nukta forms and short e/o
+        elif unit.isdigit() and previous in LETTERS:
+            return False
+        # "tQ" is a dedicated nukta form
+        elif unit == "t" and following == "Q":
+            return False
+        # A standalone "oM" becomes the oṃ ligature
+        elif unit == "o" and following == "M" and previous not in DEVANAGARI_CONSONANTS:
+            return False
+        previous = unit
+    return True
+
+
+def _accents_before_yogavahas(units: List[str]) -> List[str]:
+    # aksharamukha puts IAST accents directly on the vowel: "kaM\_" -> "ka̱ṃ"
+    units = list(units)
+    for i in range(1, len(units)):
+        if units[i] in ACCENTS and units[i - 1] in YOGAVAHA_SET:
+            units[i - 1], units[i] = units[i], units[i - 1]
+    return units
+
+
+def _accents_after_yogavahas(units: List[str]) -> List[str]:
+    # ...and Devanagari accents after the anusvāra/visarga: "ki\'M" -> "किं॑"
+    units = list(units)
+    for i in range(len(units) - 2, -1, -1):
+        if units[i] in ACCENTS and units[i + 1] in YOGAVAHA_SET:
+            units[i], units[i + 1] = units[i + 1], units[i]
+    return units
+
+
+def to_iast(text: str) -> str:
+    result = []
+    for unit in _accents_before_yogavahas(_units(text)):
+        if unit in ACCENTS:
+            result.append(ACCENTS[unit][0])
+        else:
+            result.append(IAST.get(unit, unit))
+    return "".join(result)
+
+
+def to_devanagari(text: str) -> str:
+    result = []
+    # Whether the last consonant still needs a vowel sign or virāma
+    open_consonant = False
+    for unit in _accents_after_yogavahas(_units(text)):
+        if unit in DEVANAGARI_VOWELS:
+            if open_consonant:
+                result.append(DEVANAGARI_MATRAS[unit])
+            else:
+                result.append(DEVANAGARI_VOWELS[unit])
+            open_consonant = False
+            continue
+
+        if open_consonant:
+            result.append(VIRAMA)
+
+        if unit in DEVANAGARI_CONSONANTS:
+            result.append(DEVANAGARI_CONSONANTS[unit])
+            open_consonant = True
+            continue
+
+        open_consonant = False
+        if unit in ACCENTS:
+            result.append(ACCENTS[unit][1])
+        elif unit.startswith("."):
+            result.append("॥" * (len(unit) // 2) + "।" * (len(unit) % 2))
+        else:
+            result.append(DEVANAGARI_OTHER.get(unit, unit))
+
+    if open_consonant:
+        result.append(VIRAMA)
+    return "".join(result)
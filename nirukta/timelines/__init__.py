@@ -1,4 +1,4 @@
-from nirukta.timelines.transform import LenientTransformMatchingDiff
+from nirukta.timelines.transform import LabelledTransformMatchingDiff
 from nirukta.timelines.utterance import UtteranceTimeline
 from nirukta.timelines.line import LineTimeline
 from nirukta.timelines.explain_sloka import ExplainSloka
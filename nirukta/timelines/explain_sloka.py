@@ -3,6 +3,7 @@ from typing import List
 from janim.imports import YELLOW, Succession, Timeline
 from nirukta.models import Line
 from nirukta.timelines.line import LineTimeline
+from nirukta.timelines.utterance import prepare_utterances
 
 
 class ExplainSloka(Timeline):
@@ -18,8 +19,15 @@ class ExplainSloka(Timeline):
 
     def construct(self):
         animations = []
+
+        # Prepare every utterance of the sloka up front so they are typeset
+        # together, then hand each line its share
+        states = iter(
+            prepare_utterances([vAkya for line in self.lines for vAkya in line.vAkyAni])
+        )
         for line in self.lines:
-            line_timeline = LineTimeline(line).build().to_item()
+            line_states = [next(states) for _ in line.vAkyAni]
+            line_timeline = LineTimeline(line, line_states).build().to_item()
             line_timeline.show()
             self.forward_to(line_timeline.end)
         self.play(Succession(*animations))
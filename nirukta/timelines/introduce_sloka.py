@@ -1,7 +1,7 @@
 from typing import Optional
 from janim.imports import DOWN, YELLOW, FadeOut, Group, Timeline, TypstText, Wait, Write
-from nirukta.models import Language, Sloka
-from nirukta.render import sloka_group, set_font, typst_code
+from nirukta.models import Sloka
+from nirukta.render import citation_code, sloka_group, set_font
 from nirukta.constants import INTRO_FONT, SCALE
 
 
@@ -26,7 +26,7 @@ class IntroduceSloka(Timeline):
 
         if self.citation is not None:
             citation_text = TypstText(
-                set_font(typst_code(self.citation, Language.SANSKRIT), INTRO_FONT),
+                set_font(citation_code(self.citation), INTRO_FONT),
                 scale=SCALE,
             )
             print(citation_text.text)
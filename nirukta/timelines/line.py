@@ -1,19 +1,25 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from nirukta.models import Line, Utterance
 
 from janim.imports import GREEN, Timeline
-from nirukta.timelines.utterance import UtteranceTimeline
+from nirukta.timelines.utterance import (
+    UtteranceStates,
+    UtteranceTimeline,
+    prepare_utterances,
+)
 
 
 @dataclass
 class LineTimeline(Timeline):
     vAkyAni: List[Utterance]
+    states: Optional[List[UtteranceStates]]
 
-    def __init__(self, line: Line):
+    def __init__(self, line: Line, states: Optional[List[UtteranceStates]] = None):
         super().__init__()
         self.vAkyAni = line.vAkyAni
+        self.states = states
 
     @property
     def gui_name(self) -> str:
@@ -24,8 +30,10 @@ class LineTimeline(Timeline):
         return GREEN
 
     def construct(self):
+        states = self.states or prepare_utterances(self.vAkyAni)
+
         # When doing translation pages we do an utterance at a time rather
         # than a line at a time.
-        for vAkya in self.vAkyAni:
-            vt = UtteranceTimeline(vAkya).build().to_item().show()
+        for vAkya, vAkya_states in zip(self.vAkyAni, states):
+            vt = UtteranceTimeline(vAkya, vAkya_states).build().to_item().show()
             self.forward_to(vt.end)
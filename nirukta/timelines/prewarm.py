@@ -0,0 +1,60 @@
+"""Typesets everything a timeline will, before it is built.
+
+Building a timeline typesets its text as it goes, one `TypstText` at a time.
+What it typesets only depends on the slokas though, so it is gathered up
+front, deduplicated, and compiled into the Typst cache in one document per
+font. With enough of it, the compiler's workers share it out and also parse
+the pages into the geometry store. Construction then only loads compiled
+output, and utterance states prepared in this process.
+"""
+
+from typing import Dict, List, Optional, Union
+
+from nirukta.compiler import compile_sources
+from nirukta.constants import INTRO_FONT, LATIN_FONT
+from nirukta.models import Sloka, SlokaFile, SutraFile
+from nirukta.render import (
+    citation_code,
+    font_preamble,
+    sloka_group_english_sources,
+    sloka_group_sources,
+)
+from nirukta.timelines.utterance import prepare_utterances, states_sources
+
+
+def slokas_sources(
+    slokas: List[Sloka], introduced: List[Sloka], citation: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """The Typst source of every `TypstText` built to explain `slokas`, to
+    introduce `introduced` with `sloka_group`, and to show the citation, as
+    the bodies to compile after each font's preamble."""
+    utterances = [
+        vAkya for sloka in slokas for line in sloka.lines for vAkya in line.vAkyAni
+    ]
+    sources = states_sources(prepare_utterances(utterances, compile=False))
+
+    intro = font_preamble(INTRO_FONT)
+    latin = font_preamble(LATIN_FONT)
+    if citation is not None:
+        sources.setdefault(intro, []).append(citation_code(citation))
+    for sloka in introduced:
+        sources.setdefault(intro, []).extend(sloka_group_sources(sloka))
+    for sloka in slokas:
+        sources.setdefault(latin, []).extend(sloka_group_english_sources(sloka))
+
+    return {preamble: list(dict.fromkeys(bodies)) for preamble, bodies in sources.items()}
+
+
+def file_sources(file: Union[SlokaFile, SutraFile]) -> Dict[str, List[str]]:
+    """The Typst source of every `TypstText` the file's timelines build."""
+    if isinstance(file, SutraFile):
+        # Sutras only introduce the slokas they number
+        introduced = [sloka for sloka in file.slokas if sloka.number is not None]
+        return slokas_sources(file.slokas, introduced, file.citation)
+    return slokas_sources([file.sloka], [file.sloka], file.citation)
+
+
+def prewarm(slokas: List[Sloka], introduced: List[Sloka], citation: Optional[str] = None):
+    """Compile everything `slokas_sources` gathers. Must be called while a
+    timeline is being built, see `compiler.compile_pages`."""
+    compile_sources(slokas_sources(slokas, introduced, citation))
@@ -3,6 +3,7 @@ from nirukta.models import Sloka, SlokaFile
 from nirukta.render import sloka_group_english
 from nirukta.timelines.explain_sloka import ExplainSloka
 from nirukta.timelines.introduce_sloka import IntroduceSloka
+from nirukta.timelines.prewarm import prewarm
 
 
 class SlokaFileTimeline(Timeline):
@@ -23,6 +24,10 @@ class SlokaFileTimeline(Timeline):
         return ORANGE
 
     def construct(self):
+        # Typeset the whole sloka at once, rather than text by text as the
+        # timelines below are built
+        prewarm([self.sloka], [self.sloka], self.citation)
+
         introduction = IntroduceSloka(self.sloka, self.citation).build().to_item()
         introduction.show()
         self.forward_to(introduction.end)
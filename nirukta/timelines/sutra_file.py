@@ -1,5 +1,4 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 from janim.imports import (
     LEFT,
@@ -22,27 +21,38 @@ from janim.imports import (
     Write,
 )
 from nirukta.constants import INACTIVE, INTRO_FONT, SCALE
-from nirukta.models import Language, Sloka, SutraFile
+from nirukta.models import Sloka
 from nirukta.timelines import UtteranceTimeline
+from nirukta.timelines.prewarm import prewarm
+from nirukta.timelines.utterance import prepare_utterances
 from nirukta.render import (
     Awaken,
+    citation_code,
     scale_with_stroke,
     set_font,
     sloka_group_english,
-    typst_code,
     sloka_group,
 )
 
 
-@dataclass
 class SutraFileTimeline(Timeline):
     citation: str
-    slokas: List[Sloka]
+    # Slokas are read as the timeline is built, so that it can start on the
+    # first while the rest are still being parsed, and kept for the next build
+    read: List[Sloka]
+    unread: Iterator[Sloka]
 
-    def __init__(self, file: SutraFile):
+    def __init__(self, citation: str, slokas: Iterable[Sloka]):
         super().__init__()
-        self.citation = file.citation
-        self.slokas = file.slokas
+        self.citation = citation
+        self.read = []
+        self.unread = iter(slokas)
+
+    def slokas(self) -> Iterator[Sloka]:
+        yield from self.read
+        for sloka in self.unread:
+            self.read.append(sloka)
+            yield sloka
 
     @property
     def gui_name(self) -> str:
@@ -53,8 +63,10 @@ class SutraFileTimeline(Timeline):
         return ORANGE
 
     def construct(self):
+        prewarm([], [], self.citation)
+
         citation = TypstText(
-            set_font(typst_code(self.citation, Language.SANSKRIT), INTRO_FONT),
+            set_font(citation_code(self.citation), INTRO_FONT),
             scale=SCALE,
         )
         citation.points.move_to(ORIGIN)
@@ -68,7 +80,16 @@ class SutraFileTimeline(Timeline):
             self.play(animation)
 
         group = Group()
-        for sloka in self.slokas:
+        for sloka in self.slokas():
+            # Typeset the whole sloka at once, rather than text by text as the
+            # timelines below are built
+            prewarm([sloka], [sloka] if sloka.number is not None else [])
+            states = iter(
+                prepare_utterances(
+                    [vAkya for line in sloka.lines for vAkya in line.vAkyAni]
+                )
+            )
+
             sloka_text: Optional[Group[TypstText]] = None
             numbered = False
 
@@ -90,8 +111,6 @@ class SutraFileTimeline(Timeline):
                     Group(number_label, sloka_text, sloka_border), 0.5
                 )
                 group.points.to_border(UL, buff=MED_SMALL_BUFF)
-
-                print(f"SLOKA NUMBER: {sloka.number}")
                 numbered = True
 
             def grey_anim(sloka_text: Group[TypstText]):
@@ -116,7 +135,7 @@ class SutraFileTimeline(Timeline):
                         )
                         self.play(Awaken(selection))
 
-                    vt = UtteranceTimeline(vAkya).build().to_item().show()
+                    vt = UtteranceTimeline(vAkya, next(states)).build().to_item().show()
                     self.forward_to(vt.end)
 
                     # if sloka_text is not None:
@@ -1,43 +1,251 @@
-from dataclasses import dataclass
-
-from janim.imports import TransformMatchingDiff, normalize, np
-
-
-class LenientTransformMatchingDiff(TransformMatchingDiff):
-    @dataclass
-    class _MatchWrapper(TransformMatchingDiff._MatchWrapper):
-        def __eq__(self, other):
-            if not isinstance(other, LenientTransformMatchingDiff._MatchWrapper):
-                return False
-            if self.item.points.same_shape(other.item):
-                return True
-            return self._loosely_same_shape(other.item)
-
-        def _loosely_same_shape(self, other_item) -> bool:
-            p1 = self.item.points.get()[:-1]
-            p2 = other_item.points.get()[:-1]
-            if len(p1) != len(p2) or len(p1) < 2:
-                return False
-            p1 = p1 - p1[0]
-            p2 = p2 - p2[0]
-            w1 = (
-                self.item.points.width_along_direction(
-                    normalize(self.item.points.start_direction)
-                )
-                or 1.0
-            )
-            w2 = (
-                other_item.points.width_along_direction(
-                    normalize(other_item.points.start_direction)
-                )
-                or 1.0
-            )
-            return np.allclose(p1 / w1, p2 / w2, atol=0.33)
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from janim.anims.transform import MatchingParams
+from janim.components.points import Cmpt_Points
+from janim.imports import (
+    RIGHT,
+    AnimGroup,
+    FadeIn,
+    FadeOut,
+    Item,
+    Points,
+    Transform,
+    TransformMatchingDiff,
+    VItem,
+    normalize,
+    np,
+)
+
+# How far apart normalised points of roughly the same shape may be
+LOOSE_TOLERANCE = 0.33
+
+
+def loose_points(item: VItem) -> np.ndarray:
+    """Points relative to the first, scaled by the width along the start
+    direction, for telling apart shapes with the same number of points.
+
+    Computes `start_direction` and `width_along_direction` the way janim does,
+    but without looping over points and subpaths in Python.
+    """
+    all_points = item.points.get()
+    start = all_points[0]
+    # `np.isclose` with its default tolerances, which is slow on small arrays
+    offsets = all_points[1:] - start
+    still = (np.abs(offsets) <= 1e-8 + 1e-5 * np.abs(start)).all(axis=1)
+    moved = np.flatnonzero(~still)
+    direction = offsets[moved[0]] if len(moved) else RIGHT
+
+    # Subpaths are separated by rows of NaN
+    projections = all_points @ normalize(direction)
+    projections = projections[~np.isnan(all_points[:, 0])]
+    width = (projections.max() - projections.min()) or 1.0
+
+    points = all_points[:-1]
+    return (points - points[0]) / width
+
+
+@dataclass
+class ShapeBucket:
+    """Representatives with the same number of points, stacked so that a new
+    shape is compared against all of them at once."""
+
+    ids: List[int] = field(default_factory=list)
+    hashes: Optional[np.ndarray] = None
+    points: Optional[np.ndarray] = None
+
+    def find(self, hashes: np.ndarray, points: np.ndarray) -> Optional[int]:
+        if not self.ids:
+            return None
+        count = len(self.ids)
+        assert self.hashes is not None and self.points is not None
+        # `same_shape`, or else `np.allclose` against each representative
+        same = (self.hashes[:count] == hashes).any(axis=1)
+        close = np.abs(self.points[:count] - points) <= (
+            LOOSE_TOLERANCE + 1e-5 * np.abs(points)
+        )
+        matches = same | close.all(axis=(1, 2))
+        if not matches.any():
+            return None
+        return self.ids[int(np.argmax(matches))]
+
+    def add(self, id: int, hashes: np.ndarray, points: np.ndarray):
+        count = len(self.ids)
+        if self.hashes is None or self.points is None:
+            self.hashes = np.empty((4, *hashes.shape), hashes.dtype)
+            self.points = np.empty((4, *points.shape))
+        elif count == len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.empty_like(self.hashes)])
+            self.points = np.concatenate([self.points, np.empty_like(self.points)])
+        self.hashes[count] = hashes
+        self.points[count] = points
+        self.ids.append(id)
+
+
+class ShapeIndex:
+    """Sorts shapes into classes of roughly the same shape.
+
+    Matching shapes is not transitive, so like a dict keyed by shape, every
+    shape joins the first representative it matches. Shapes only ever match
+    ones with the same number of points, which makes for the buckets that are
+    searched.
+    """
+
+    buckets: Dict[int, ShapeBucket]
+    next_id: int
+
+    def __init__(self):
+        self.buckets = {}
+        self.next_id = 0
+
+    def classify(self, item: VItem, represent: bool) -> int:
+        """The class of `item`. Unless it should `represent` a new class, an
+        item matching nothing gets an id of its own."""
+        count = len(item.points.get()) - 1
+        # Janim considers all degenerate shapes the same
+        if count < 2:
+            bucket = self.buckets.setdefault(-1, ShapeBucket())
+            if not bucket.ids and represent:
+                bucket.ids.append(self.new_id())
+            return bucket.ids[0] if bucket.ids else self.new_id()
+
+        hashes = np.array(item.points.identity[0], dtype=np.int64)
+        points = loose_points(item)
+        bucket = self.buckets.setdefault(count, ShapeBucket())
+        found = bucket.find(hashes, points)
+        if found is not None:
+            return found
+
+        id = self.new_id()
+        if represent:
+            bucket.add(id, hashes, points)
+        return id
 
-        def __hash__(self):
-            return 0
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+
+# Like difflib's opcodes, but with the pieces themselves
+Segment = Tuple[str, List[VItem], List[VItem]]
+
+
+def pieces(item: Item) -> List[VItem]:
+    """The pieces `TransformMatchingDiff` matches, in the same order."""
+    return [
+        piece
+        for piece in item.walk_self_and_descendants()
+        if isinstance(piece, VItem) and piece.points.has()
+    ]
+
+
+def piece_labels(item: Item) -> Dict[int, str]:
+    """The Typst label of every labelled piece of `item`, by piece id."""
+    groups = getattr(item, "groups", {})
+    return {id(piece): label for label, group in groups.items() for piece in group}
+
+
+def shape_segments(a: List[VItem], b: List[VItem]) -> List[Segment]:
+    """Pieces matched by shape, roughly the same shapes counting as equal, for
+    whatever labels can't pair."""
+    index = ShapeIndex()
+    b_ids = [index.classify(piece, represent=True) for piece in b]
+    a_ids = [index.classify(piece, represent=False) for piece in a]
+    return [
+        (tag, a[i1:i2], b[j1:j2])
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(
+            None, a_ids, b_ids
+        ).get_opcodes()
+    ]
+
+
+def labelled_segments(
+    src: Item, target: Item, lineage: Dict[str, List[str]]
+) -> List[Segment]:
+    """Pair the pieces of `src` and `target` by their Typst labels.
+
+    Pieces under a label both share are the same token in both frames, and
+    are paired one to one. Pieces of a token that was replaced are matched
+    by shape against those of the tokens that replaced it, according to
+    `lineage` (parent label -> child labels). Only what is left unlabelled
+    is matched by shape as a whole.
+    """
+    src_labels = piece_labels(src)
+    target_labels = piece_labels(target)
+    parents = {child: parent for parent, children in lineage.items() for child in children}
+
+    groups: Dict[Optional[str], Tuple[List[VItem], List[VItem]]] = {}
+    for piece in pieces(src):
+        groups.setdefault(src_labels.get(id(piece)), ([], []))[0].append(piece)
+    for piece in pieces(target):
+        label = target_labels.get(id(piece))
+        if label not in groups:
+            label = parents.get(label, label)  # type: ignore[arg-type]
+        groups.setdefault(label, ([], []))[1].append(piece)
+
+    segments: List[Segment] = []
+    for label, (a, b) in groups.items():
+        if label is not None and label not in lineage and len(a) == len(b):
+            segments.append(("equal", a, b))
+        else:
+            segments += shape_segments(a, b)
+    return segments
+
+
+class LabelledTransformMatchingDiff(AnimGroup):
+    """`TransformMatchingDiff` for frames whose pieces are labelled by token,
+    see `labelled_segments`. Takes the same handlers, which are called in the
+    same way."""
+
+    label_color = TransformMatchingDiff.label_color
+
+    def __init__(
+        self,
+        src: Item,
+        target: Item,
+        *,
+        lineage: Optional[Dict[str, List[str]]] = None,
+        match=lambda item1, item2, p, **kwargs: Transform(item1, item2, **kwargs),
+        mismatch=(
+            lambda item, p, **kwargs: FadeOut(item, shift=p.target_center - p.src_center, **kwargs),
+            lambda item, p, **kwargs: FadeIn(item, shift=p.target_center - p.src_center, **kwargs),
+        ),
+        duration: float = 2,
+        lag_ratio: float = 0,
+        collapse: bool = True,
+        name=None,
+        **kwargs,
+    ):
+        src_mismatch, target_mismatch = mismatch
+        kwargs["root_only"] = True
+
+        params = MatchingParams(
+            src(Points).points.box.center, target(Points).points.box.center
+        )
+
+        animations = []
+        for tag, a, b in labelled_segments(src, target, lineage or {}):
+            if tag == "equal":
+                animations += [match(x, y, params, **kwargs) for x, y in zip(a, b)]
+                continue
+
+            mismatch_params = params
+            if tag == "replace":
+                # Mismatches move towards each other, rather than with the whole
+                mismatch_params = MatchingParams(
+                    Cmpt_Points.BoundingBox(
+                        np.vstack([x.points.self_box.get_corners() for x in a])
+                    ).center,
+                    Cmpt_Points.BoundingBox(
+                        np.vstack([y.points.self_box.get_corners() for y in b])
+                    ).center,
+                )
+            animations += [src_mismatch(x, mismatch_params, **kwargs) for x in a]
+            animations += [target_mismatch(y, mismatch_params, **kwargs) for y in b]
 
-    def __init__(self, *args, name=None, **kwargs):
-        super().__init__(*args, **kwargs)
+        super().__init__(
+            *animations, duration=duration, lag_ratio=lag_ratio, collapse=collapse
+        )
         if name is not None:
             self.name = name
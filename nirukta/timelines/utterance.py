@@ -1,6 +1,9 @@
+import hashlib
+import os
+import pickle
 from dataclasses import dataclass
-from itertools import chain
-from typing import List
+from itertools import count, repeat
+from typing import Dict, List, Optional, Tuple
 
 from janim.imports import (
     BLUE,
@@ -10,6 +13,7 @@ from janim.imports import (
     WHITE,
     Aligned,
     FadeOut,
+    Group,
     Timeline,
     TypstText,
     Wait,
@@ -18,7 +22,11 @@ from janim.imports import (
     rush_into,
     linear,
 )
-from nirukta.timelines.transform import LenientTransformMatchingDiff
+from nirukta import compiler, profiling
+from nirukta.cache import cache_path, code_fingerprint
+from nirukta.compiler import compile_sources
+from nirukta.layout import TokenSource, compose, glyph_bodies, recolored
+from nirukta.timelines.transform import LabelledTransformMatchingDiff
 from nirukta.constants import (
     COLORS,
     INACTIVE,
@@ -33,19 +41,20 @@ from nirukta.constants import (
 from nirukta.models import (
     Animation,
     DisplayToken,
+    FrameSequence,
+    GlossIndex,
     Language,
     TokenType,
     Utterance,
     build_colorings,
     build_display_token,
-    frames_for_vakya,
     process_token,
 )
-from nirukta.strings import unswara
 from nirukta.render import (
     Awaken,
     Diff,
     Junicode_translit,
+    font_preamble,
     set_font,
     transform_text,
     typst_code,
@@ -53,15 +62,294 @@ from nirukta.render import (
 )
 
 
+@dataclass
+class UtteranceStates:
+    """The tokens of every frame (sa, tr) and the English as Typst source, in
+    white, with the colors of every frame and the diffs between frames.
+
+    Frames only differ in which tokens they show and in color, so every token
+    and the English are compiled once and recolored per frame, see `recolor`.
+    Plain data, so it can be prepared away from the timeline, see
+    `prepare_utterances`.
+    """
+
+    tokens: List[List[List[TokenSource]]]
+    # The English, as spans labelled by `english_label` and unlabelled text
+    english: List[tuple[Optional[str], str]]
+    english_colors: List[Dict[str, str]]
+    diffs: List[Diff]
+
+    @property
+    def english_source(self) -> str:
+        return "".join(code if label is None else f"{code}<{label}>" for label, code in self.english)
+
+
+def english_label(index: int) -> str:
+    return f"e{index}"
+
+
+@profiling.traced("tokens", "display tokens")
+def build_display_tokens(utterance: Utterance) -> List[DisplayToken]:
+    tokens = utterance.tokens
+
+    refs: List[tuple[str, List[tuple[int, int]]]] = []
+
+    # Resolved once, shared by both walks over the tokens
+    index = GlossIndex(utterance.english)
+    for token in tokens:
+        refs += process_token(index, token)
+
+    colorings = build_colorings(tokens, COLORS)
+    # Same utterance, same labels, same Typst source
+    ids = count()
+    display_tokens = [
+        build_display_token(index, token, colorings, ids) for token in tokens
+    ]
+
+    for i in range(len(display_tokens)):
+        if _ := ALPHA_RE.search(display_tokens[i].slp1):
+            display_tokens[i].is_root = True
+            display_tokens[i].color = INACTIVE
+            log.debug(f"{display_tokens[i].slp1} is a `DisplayToken` root")
+
+    return display_tokens
+
+
+def build_utterance_states(utterance: Utterance) -> UtteranceStates:
+    english_text = utterance.english
+    display_tokens = build_display_tokens(utterance)
+
+    frames = FrameSequence(display_tokens)
+
+    all_english_spans: List[tuple[int, int]] = sorted(
+        (span for token in display_tokens for span in token.all_spans()),
+        key=lambda x: x[0],
+    )
+    all_english_spans.append((len(english_text), len(english_text)))
+
+    log.debug(f"all english spans: {all_english_spans}")
+
+    # The English is the same in every frame bar the colors of its spans
+    english: List[tuple[Optional[str], str]] = []
+    cursor = 0
+    for i, a in enumerate(all_english_spans):
+        if a[0] > cursor:
+            missing_text = english_text[cursor : a[0]]
+            for chunk in MISSING_CHUNK_RE.finditer(missing_text):
+                chunk = chunk.group()
+                # Whitespace is already in the right format
+                if WHITESPACE_RE.fullmatch(chunk):
+                    english.append((None, chunk))
+                # Typst Commands are already in the right format
+                elif TYPST_CMD_RE.fullmatch(chunk):
+                    english.append((None, chunk))
+                # Everything else should be wrapped
+                else:
+                    english.append((None, typst_code(chunk, Language.ENGLISH, WHITE)))
+
+                # Move cursor
+                cursor += len(chunk)
+
+            assert cursor == a[0], "Cursor moved to span start"
+
+        english.append(
+            (english_label(i), typst_code(english_text[a[0] : a[1]], Language.ENGLISH))
+        )
+
+        cursor += a[1] - a[0]
+
+    # sa, tr
+    tokens: List[List[List[TokenSource]]] = [[], []]
+    english_colors: List[Dict[str, str]] = []
+    diffs: List[Diff] = []
+
+    for step in frames.steps:
+        diffs.append(
+            Diff(
+                step.animation,
+                step.token.label,
+                step.token.is_root,
+                {step.token.label: [child.label for child in step.children]},
+            )
+        )
+
+    for frame in frames:
+        sanskrit: List[TokenSource] = []
+        translit: List[TokenSource] = []
+
+        for token in frame:
+            sanskrit.append(
+                (token.label, typst_code(token.slp1, Language.SANSKRIT), token.color)
+            )
+            iast = transform_text(token.slp1, Language.TRANSLIT)
+            translit.append((token.label, Junicode_translit(iast, WHITE), token.color))
+
+        frame_spans: Dict[tuple[int, int], str] = {}
+        for token in frame:
+            for span in token.english_spans:
+                frame_spans.setdefault(span, token.color)
+
+        tokens[0].append(sanskrit)
+        tokens[1].append(translit)
+        # Spans not represented in the current frame are inactive
+        english_colors.append(
+            {
+                english_label(i): frame_spans.get(a, INACTIVE)
+                for i, a in enumerate(all_english_spans)
+            }
+        )
+
+    return UtteranceStates(tokens, english, english_colors, diffs)
+
+
+def utterance_fingerprint(utterance: Utterance) -> str:
+    # The models are plain dataclasses and enums, whose reprs cover every
+    # token, gloss and the English
+    md5 = hashlib.md5(code_fingerprint().encode())
+    md5.update(repr(utterance).encode())
+    return md5.hexdigest()
+
+
+def load_states(fingerprint: str) -> Optional[UtteranceStates]:
+    try:
+        with open(cache_path("utterances", fingerprint + ".pkl"), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def store_states(fingerprint: str, states: UtteranceStates):
+    path = cache_path("utterances", fingerprint + ".pkl")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(states, f)
+    os.replace(tmp_path, path)
+
+
+def states_sources(states: List[UtteranceStates]) -> Dict[str, List[str]]:
+    """The Typst source of every distinct token and English of `states`, as the
+    bodies to compile after each font's preamble."""
+    sanskrit: Dict[str, None] = {}
+    latin: Dict[str, None] = {}
+    for utterance_states in states:
+        sanskrit.update(dict.fromkeys(glyph_bodies(utterance_states.tokens[0])))
+        latin.update(dict.fromkeys(glyph_bodies(utterance_states.tokens[1])))
+        latin[utterance_states.english_source] = None
+    return {
+        font_preamble(SANSKRIT_FONT): list(sanskrit),
+        font_preamble(LATIN_FONT): list(latin),
+    }
+
+
+def frame_items(states: UtteranceStates) -> List[List[Group]]:
+    """Every frame (sa, tr, en) as items, once `states` are compiled."""
+    # Frames of tokens are composed from the glyphs of each token, and the
+    # English typeset once, all recolored for every frame
+    items: List[List[Group]] = [
+        [compose(font, frame, SCALE) for frame in frames]
+        for frames, font in zip(states.tokens, [SANSKRIT_FONT, LATIN_FONT])
+    ]
+    english = TypstText(set_font(states.english_source, LATIN_FONT), scale=SCALE)
+    items.append([recolored(english, colors) for colors in states.english_colors])
+    return items
+
+
+# States prepared by this process, so that timelines built after a prewarm
+# take them from memory, see `prewarm`
+_prepared: Dict[str, UtteranceStates] = {}
+
+# Below this many utterances per worker, starting the workers costs more than
+# they save: each is a dozen or so pages for janim to parse at some 30 ms a
+# page, against a second or so to start a worker
+PARALLEL_UTTERANCES = 2
+
+
+def _prepare_batch(
+    utterances: Dict[str, Utterance], compile: bool, preambles: Tuple[str, str]
+) -> Tuple[List[UtteranceStates], int, List[dict]]:
+    """In a worker, what `prepare_utterances` does for `utterances`, by
+    fingerprint, typesetting them straight into the geometry store."""
+    states = []
+    for fingerprint, utterance in utterances.items():
+        states.append(build_utterance_states(utterance))
+        store_states(fingerprint, states[-1])
+    compilations = compiler.typeset(states_sources(states), preambles) if compile else 0
+    # Profiled spans go back with the result, see `profiling.drain`
+    return states, compilations, profiling.drain()
+
+
+def prepare_utterances(
+    utterances: List[Utterance], compile: bool = True
+) -> List[UtteranceStates]:
+    """Build the frame states of every utterance and compile them into the Typst
+    cache, every distinct token and English in one document per font rather
+    than paying the compiler setup for each. States are stored on disk under
+    the utterance's fingerprint and reused for as long as neither the utterance
+    nor the code changes.
+
+    With enough of them to build, utterances are spread over the compiler's
+    worker `pool`, which also parses what it typesets into the geometry store,
+    leaving this process to load the results in order.
+
+    Without `compile` the states are only built, for the caller to compile
+    along with whatever else it typesets.
+    """
+    # Only utterances whose fingerprint changed since the last build are
+    # rebuilt, the rest come straight from the cache
+    fingerprints = [utterance_fingerprint(utterance) for utterance in utterances]
+    known: dict[str, UtteranceStates] = {}
+    changed: dict[str, Utterance] = {}
+    for fingerprint, utterance in zip(fingerprints, utterances):
+        if fingerprint in known or fingerprint in changed:
+            continue
+        if fingerprint in _prepared:
+            known[fingerprint] = _prepared[fingerprint]
+        elif (states := load_states(fingerprint)) is not None:
+            known[fingerprint] = states
+        else:
+            changed[fingerprint] = utterance
+
+    if changed and known:
+        log.info(f"Reusing {len(known)} unchanged utterances, rebuilding {len(changed)}")
+
+    # Building states alone takes milliseconds, it is typesetting them that is
+    # worth the workers
+    workers = compiler.workers_for(len(changed), PARALLEL_UTTERANCES) if compile else 0
+    if workers > 1:
+        # A batch per worker
+        pending = list(changed.items())
+        size = -(-len(pending) // workers)
+        batches = [dict(pending[i : i + size]) for i in range(0, len(pending), size)]
+        results = compiler.pool().map(
+            _prepare_batch, batches, repeat(compile), repeat(compiler.preambles())
+        )
+        for batch, (states, compilations, events) in zip(batches, results):
+            known.update(zip(batch, states))
+            compiler.claim(compilations, events)
+    else:
+        for fingerprint, utterance in changed.items():
+            states = build_utterance_states(utterance)
+            store_states(fingerprint, states)
+            known[fingerprint] = states
+    if compile:
+        # Whatever the workers typeset is cached by now
+        compile_sources(states_sources(list(known.values())))
+
+    _prepared.update(known)
+    return [known[fingerprint] for fingerprint in fingerprints]
+
+
 @dataclass
 class UtteranceTimeline(Timeline):
     tokens: List[TokenType]
     english: str
+    states: Optional[UtteranceStates]
 
-    def __init__(self, utterance: Utterance):
+    def __init__(self, utterance: Utterance, states: Optional[UtteranceStates] = None):
         super().__init__()
         self.tokens = utterance.tokens
         self.english = utterance.english
+        self.states = states
 
     @property
     def gui_name(self) -> str:
@@ -72,126 +360,14 @@ class UtteranceTimeline(Timeline):
         return BLUE
 
     def construct(self):
-        refs: List[tuple[str, List[tuple[int, int]]]] = []
-
-        visited = set()
-        for token in self.tokens:
-            refs += process_token(self.english, token, visited)
-
-        visited = set()
-        colorings = build_colorings(self.tokens, COLORS)
-        display_tokens = [
-            build_display_token(self.english, token, visited, colorings)
-            for token in self.tokens
-        ]
-
-        for i in range(len(display_tokens)):
-            if _ := ALPHA_RE.search(display_tokens[i].slp1):
-                display_tokens[i].is_root = True
-                display_tokens[i].color = INACTIVE
-                log.debug(f"{display_tokens[i].slp1} is a `DisplayToken` root")
-
-        frames = frames_for_vakya(display_tokens)
-
-        all_english_spans: List[tuple[int, int]] = DisplayToken(
-            "", WHITE, children=display_tokens, english_spans=[]
-        ).all_spans()
-        all_english_spans.append((len(self.english), len(self.english)))
-
-        log.debug(f"all english spans: {all_english_spans}")
-
-        # sa, tr, en
-        states: List[List[TypstText]] = [[], [], []]
-        diffs: List[Diff] = []
-
-        # is_root = True
-
-        for i in range(len(frames) - 1):
-            # compare this frame to the next frame
-            fa = frames[i]
-            fb = frames[i + 1]
-
-            # Keep track of known diffs to ensure compliance
-            diff_count = len(diffs)
-
-            # For each item in the new frame
-            for j in range(len(fa)):
-                id = fa[j].id
-                initial = fa[j].is_root
-
-                # Expansion
-                if len(fa) != len(fb) and fa[j].slp1 != fb[j].slp1:
-                    diffs.append(Diff(Animation.EXPAND, id, initial))
-                # Swaras changed
-                elif (
-                    unswara(fa[j].slp1) != fa[j].slp1
-                    and unswara(fa[j].slp1) == fb[j].slp1
-                ):
-                    diffs.append(Diff(Animation.SWARAS, id, initial))
-                # Spelling changed
-                elif fa[j].slp1 != fb[j].slp1:
-                    diffs.append(Diff(Animation.SPELLS, id, initial))
-                # Color changed
-                elif fa[j].color != fb[j].color:
-                    diffs.append(Diff(Animation.COLORS, id, initial))
-
-                # Exit once we've added to the list
-                if len(diffs) > diff_count:
-                    break
-
-            assert len(diffs) != diff_count, "Unknown diff type"
-
-        for i, frame in enumerate(frames):
-            sanskrit = ""
-            translit = ""
-            english = ""
-
-            for token in frame:
-                sanskrit += f"{typst_code(token.slp1, Language.SANSKRIT, token.color)}<{token.id}> "
-                iast = transform_text(token.slp1, Language.TRANSLIT)
-                translit += f"{Junicode_translit(iast, token.color)}<{token.id}> "
-
-            frame_spans = [
-                ((start, end), token.color)
-                for token in frame
-                for start, end in token.english_spans
-            ]
-
-            cursor = 0
-            for a in all_english_spans:
-                if a[0] > cursor:
-                    missing_text = self.english[cursor : a[0]]
-                    for chunk in MISSING_CHUNK_RE.finditer(missing_text):
-                        chunk = chunk.group()
-                        # Whitespace is already in the right format
-                        if WHITESPACE_RE.fullmatch(chunk):
-                            english += chunk
-                        # Typst Commands are already in the right format
-                        elif TYPST_CMD_RE.fullmatch(chunk):
-                            english += chunk
-                        # Everything else should be wrapped
-                        else:
-                            english += typst_code(chunk, Language.ENGLISH, WHITE)
-
-                        # Move cursor
-                        cursor += len(chunk)
-
-                    assert cursor == a[0], "Cursor moved to span start"
-
-                # If it is represented in the current frame
-                color = next((color for b, color in frame_spans if a == b), INACTIVE)
-
-                english += typst_code(
-                    self.english[a[0] : a[1]],
-                    Language.ENGLISH,
-                    color,
-                )
-
-                cursor += a[1] - a[0]
+        # States handed in were prepared, and typeset, along with the rest of
+        # the sloka
+        utterance_states = (
+            self.states or prepare_utterances([Utterance(self.tokens, self.english)])[0]
+        )
+        diffs = utterance_states.diffs
 
-            states[0].append(TypstText(set_font(sanskrit, SANSKRIT_FONT), scale=SCALE))
-            states[1].append(TypstText(set_font(translit, LATIN_FONT), scale=SCALE))
-            states[2].append(TypstText(set_font(english, LATIN_FONT), scale=SCALE))
+        states = frame_items(utterance_states)
 
         for i in range(len(states[0])):
             # Start the transliteration in the center
@@ -234,9 +410,10 @@ class UtteranceTimeline(Timeline):
                 self.play(
                     Aligned(
                         *(
-                            LenientTransformMatchingDiff(
+                            LabelledTransformMatchingDiff(
                                 s[i - 1],
                                 s[i],
+                                lineage=diff.lineage,
                                 duration=diff.duration(),
                                 mismatch=diff.mismatch(),  # type: ignore[arg-type]
                                 name=diff.name(),
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Iterable, Iterator, Union
+
+from nirukta.models import (
+    CompoundToken,
+    Language,
+    SimpleToken,
+    Sloka,
+    SlokaFile,
+    SutraFile,
+    TokenType,
+)
+from nirukta import profiling, slp1
+from nirukta.strings import unswara
+
+SCRIPTS = {
+    Language.TRANSLIT: "IAST",
+    Language.SANSKRIT: "DEVANAGARI",
+}
+
+NATIVE = {
+    Language.TRANSLIT: slp1.to_iast,
+    Language.SANSKRIT: slp1.to_devanagari,
+}
+
+# Delimiters `build_display_token` inserts around compound parts
+COMPOUND_MARKS = ["\\[", "\\]", "\\{", "\\}", "+"]
+
+CACHE_SIZE = 16384
+
+_cache: OrderedDict[tuple[str, Language], str] = OrderedDict()
+
+
+def _remember(text: str, language: Language, result: str):
+    _cache[(text, language)] = result
+    _cache.move_to_end((text, language))
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def aksharamukha_process(text: str, language: Language) -> str:
+    # Imported on demand, aksharamukha takes seconds to load
+    from aksharamukha import transliterate as aksharamukha
+
+    return aksharamukha.process("SLP1", SCRIPTS[language], text)
+
+
+def convert(text: str, language: Language) -> str:
+    """Uncached SLP1 -> IAST/Devanagari, natively wherever possible."""
+    if slp1.supports(text):
+        return NATIVE[language](text)
+    return aksharamukha_process(text, language)
+
+
+def transliterate(text: str, language: Language) -> str:
+    """SLP1 -> IAST/Devanagari through a bounded LRU cache."""
+    key = (text, language)
+    result = _cache.get(key)
+    if result is None:
+        result = convert(text, language)
+        _remember(text, language, result)
+    else:
+        _cache.move_to_end(key)
+    return result
+
+
+def transliterate_all(texts: Iterable[str]):
+    """Populate the cache for every given SLP1 string. Strings the native
+    engine can't handle are converted with a single aksharamukha call per
+    script."""
+    texts = list(texts)
+    for language in SCRIPTS:
+        missing = sorted({t for t in texts if t and (t, language) not in _cache})
+
+        foreign = []
+        for text in missing:
+            if slp1.supports(text):
+                _remember(text, language, NATIVE[language](text))
+            else:
+                foreign.append(text)
+
+        if not foreign:
+            continue
+
+        results = aksharamukha_process("\n".join(foreign), language).split("\n")
+        if len(results) != len(foreign):
+            # Something spanned lines, convert one at a time instead
+            results = [aksharamukha_process(t, language) for t in foreign]
+
+        for text, result in zip(foreign, results):
+            _remember(text, language, result)
+
+
+def _token_slp1s(token: TokenType) -> Iterator[str]:
+    if isinstance(token, SimpleToken):
+        yield token.slp1
+        yield unswara(token.slp1)
+    elif isinstance(token, CompoundToken):
+        yield token.slp1
+        yield unswara(token.slp1)
+        for part in token.parts:
+            yield from _token_slp1s(part)
+    else:
+        yield token
+
+
+def file_slp1s(file: Union[SlokaFile, SutraFile]) -> set[str]:
+    """Every distinct SLP1 string the timelines of a parsed file transliterate."""
+    slokas = file.slokas if isinstance(file, SutraFile) else [file.sloka]
+    texts = {file.citation, *COMPOUND_MARKS}
+    for sloka in slokas:
+        for line in sloka.lines:
+            for vAkya in line.vAkyAni:
+                for token in vAkya.tokens:
+                    texts.update(_token_slp1s(token))
+    return texts
+
+
+@profiling.traced("transliteration")
+def pretransliterate(file: Union[SlokaFile, SutraFile]):
+    transliterate_all(file_slp1s(file))
+
+
+def pretransliterated(citation: str, slokas: Iterable[Sloka]) -> Iterator[Sloka]:
+    """The slokas of a sutra, each pretransliterated as it comes."""
+    for sloka in slokas:
+        pretransliterate(SutraFile(citation, [sloka]))
+        yield sloka
@@ -1,13 +1,5 @@
 import os
 import glob
-from janim.imports import WHITE
-from aksharamukha import transliterate
-
-from nirukta.models.enums import Language
-from nirukta.constants import SCALE, TYPST_CMD_RE
-from nirukta.parsing.visitors.sloka import SlokaVisitor
-from nirukta.parsing.visitors.sutra import SutraVisitor
-from nirukta.timelines import SlokaFileTimeline, SutraFileTimeline
 
 
 def is_nirukta_file(file: str):
@@ -59,12 +51,21 @@ def choose_nirukta_file() -> str:
 
 
 def file_to_timeline(chosen: str):
+    # Timelines load janim, only import them once they're needed
+    from nirukta.parsing.visitors import SlokaVisitor, SutraVisitor
+    from nirukta.timelines import SlokaFileTimeline, SutraFileTimeline
+    from nirukta.transliteration import pretransliterate, pretransliterated
+
     print(f"Loading {chosen}...")
     #
     # with open(chosen) as f:
     #     source = f.read()
 
     if ".sutra" in chosen:
-        return SutraFileTimeline(SutraVisitor(chosen).parse())
+        # The timeline starts on the first sloka while the rest are parsed
+        citation, slokas = SutraVisitor(chosen).parse_slokas()
+        return SutraFileTimeline(citation, pretransliterated(citation, slokas))
     else:
-        return SlokaFileTimeline(SlokaVisitor(chosen).parse())
+        sloka = SlokaVisitor(chosen).parse()
+        pretransliterate(sloka)
+        return SlokaFileTimeline(sloka)